@@ -0,0 +1,310 @@
+# Renderer, input and FOV backends for Game. The libtcod ones need the
+# libtcod library; the others run anywhere, e.g. for headless simulation.
+import numpy
+
+from fov import ShadowcastFov
+from hud import Bar, MessagePanel
+from palette import (color_black, color_dark_ground, color_dark_wall, color_darker_red, color_light_ground,
+	color_light_red, color_light_wall, color_white, pack, palette, to_rgb, unpack)
+from tilemap import TILE_FLOOR, TILE_WALL, tile_types
+
+try:
+	import libtcodpy as libtcod
+except Exception:
+	# no libtcod library for this platform, only the headless backends work
+	libtcod = None
+
+# the HUD panel below the map: the HP bar, and the message log to its right
+PANEL_HEIGHT = 5
+BAR_WIDTH = 20
+MSG_X = BAR_WIDTH + 2
+MSG_HEIGHT = PANEL_HEIGHT - 1
+
+# how each tile type looks when unexplored, remembered (explored but out
+# of view) and visible, as (char, foreground, background)
+tile_appearance = {
+	TILE_WALL: [(' ', color_white, color_black), (' ', color_white, color_dark_wall),
+		(' ', color_white, color_light_wall)],
+	TILE_FLOOR: [(' ', color_white, color_black), (' ', color_white, color_dark_ground),
+		(' ', color_white, color_light_ground)],
+}
+
+# the same as a lookup table indexed by tile type * 3 + visibility, with
+# the chars and colors also as arrays, so the whole map is one gather
+tile_looks = [tile_appearance[tile][visibility]
+	for tile in range(len(tile_types)) for visibility in range(3)]
+tile_chars = numpy.array([ord(char) for (char, fore, back) in tile_looks], dtype=numpy.int32)
+tile_fores = to_rgb([fore for (char, fore, back) in tile_looks]).astype(numpy.int32)
+tile_backs = to_rgb([back for (char, fore, back) in tile_looks]).astype(numpy.int32)
+
+
+class LibtcodRenderer:
+	# Draws the game in a libtcod window. Only cells that changed since the
+	# last frame are repainted on "con" and blitted to the root console. The
+	# HUD widgets draw on their own "panel" console, blitted below the map
+	def __init__(self, width, height, title, fps_limit, font='arial10x10.png'):
+		self.width = width
+		self.height = height
+		self.frame_milli = 1000 // fps_limit
+
+		libtcod.console_set_custom_font(font, libtcod.FONT_TYPE_GREYSCALE | libtcod.FONT_LAYOUT_TCOD)
+		libtcod.console_init_root(width, height, title, False)
+		libtcod.sys_set_fps(fps_limit)
+		self.con = libtcod.console_new(width, height)
+		# the map's chars and colors, filled into "con" in one go
+		self.buffer = libtcod.ArrayConsoleBuffer(width, height)
+
+		self.panel = libtcod.console_new(width, PANEL_HEIGHT)
+		self.panel_y = height - PANEL_HEIGHT
+		self.widgets = [
+			Bar(1, 1, BAR_WIDTH, 'HP', lambda game: (game.player.fighter.hp, game.player.fighter.max_hp),
+				color_light_red, color_darker_red),
+			MessagePanel(MSG_X, 1, width - MSG_X, MSG_HEIGHT),
+		]
+
+		# what is on "con" right now
+		self.tile_map = None
+		self.revision = None
+		self.fov_revision = None
+		self.decal_revision = None
+		self.look = None
+		self.decals = None
+		self.log_revision = None
+
+		self.colors = {}
+
+	def is_open(self):
+		return not libtcod.console_is_window_closed()
+
+	def color(self, packed):
+		# libtcod Color for a packed palette color, made once per color
+		color = self.colors.get(packed)
+		if color is None:
+			color = self.colors[packed] = libtcod.Color(*unpack(packed))
+		return color
+
+	def render(self, game):
+		if (game.map is self.tile_map and game.revision == self.revision and
+				game.log.revision == self.log_revision):
+			# nothing changed, skip drawing and flushing. console_flush is
+			# what keeps the frame rate, so wait out the frame instead
+			libtcod.sys_sleep_milli(self.frame_milli)
+			return
+		self.revision = game.revision
+		self.log_revision = game.log.revision
+
+		# rectangles (x, y, w, h) of "con" that need blitting this frame
+		dirty = []
+
+		cells = game.object_index.pop_changed()
+		if game.map is not self.tile_map:
+			# new level, repaint everything
+			self.tile_map = game.map
+			self.fov_revision = None
+			self.look = None
+			self.decals = None
+			self.buffer.clear()
+			libtcod.console_clear(self.con)
+			cells = set(game.object_index.cells)
+			dirty.append((0, 0, self.width, self.height))
+			# which covers the panel too
+			libtcod.console_clear(self.panel)
+			for widget in self.widgets:
+				widget.invalidate()
+
+		if (game.fov_revision != self.fov_revision or
+				game.map.decal_revision != self.decal_revision):
+			self.fov_revision = game.fov_revision
+			self.decal_revision = game.map.decal_revision
+			changed = self.render_map(game)
+
+			ys, xs = numpy.nonzero(changed)
+			if len(xs):
+				x1, y1 = int(xs.min()), int(ys.min())
+				dirty.append((x1, y1, int(xs.max()) - x1 + 1, int(ys.max()) - y1 + 1))
+			# the map fill wrote over every object. outside the changed
+			# cells they are drawn back as they were, so the root console
+			# already has them
+			self.draw_objects(game)
+
+		for (x, y) in cells:
+			self.draw_cell(game, x, y)
+			dirty.append((x, y, 1, 1))
+
+		# blit the changed parts of "con" to the root console
+		for (x, y, w, h) in dirty:
+			libtcod.console_blit(self.con, x, y, w, h, 0, x, y)
+			libtcod.console_set_dirty(x, y, w, h)
+
+		# then the HUD widgets whose values changed, from the panel
+		for widget in self.widgets:
+			if widget.update(self.panel, game, self.color):
+				(x, y, w, h) = (widget.x, widget.y, widget.width, widget.height)
+				libtcod.console_blit(self.panel, x, y, w, h, 0, x, self.panel_y + y)
+				libtcod.console_set_dirty(x, self.panel_y + y, w, h)
+
+		libtcod.console_flush()
+
+	def render_map(self, game):
+		# look up the char and colors of every map cell from its tile type
+		# and whether it's unexplored, remembered or visible, and fill them
+		# into "con". returns a height x width bool array of the cells that changed
+		tile_map = game.map
+		tile_type = numpy.frombuffer(tile_map.tile_type, dtype=numpy.uint8).astype(numpy.int32)
+		explored = numpy.frombuffer(tile_map.explored, dtype=numpy.uint8)
+		visible = game.fov_mask.ravel()
+
+		# if not visible right now, player can only see it if it's been explored
+		look = (tile_type * 3 + explored * (1 + visible)).reshape(tile_map.height, tile_map.width)
+
+		buffer = self.buffer
+		(h, w) = look.shape
+		buffer.char[:h, :w] = tile_chars[look]
+		for (c, name) in enumerate(['fore_r', 'fore_g', 'fore_b']):
+			getattr(buffer, name)[:h, :w] = tile_fores[look, c]
+		for (c, name) in enumerate(['back_r', 'back_g', 'back_b']):
+			getattr(buffer, name)[:h, :w] = tile_backs[look, c]
+
+		# decals in view go over the tiles
+		decal_char = tile_map.plane('decal_char')
+		decals = numpy.where(game.fov_mask, decal_char, 0).astype(numpy.int32)
+		shown = decals != 0
+		if shown.any():
+			buffer.char[:h, :w][shown] = decal_char[shown]
+			fore = palette.rgb[tile_map.plane('decal_color')[shown]]
+			for (c, name) in enumerate(['fore_r', 'fore_g', 'fore_b']):
+				getattr(buffer, name)[:h, :w][shown] = fore[:, c]
+			# tell apart decals of the same char in different colors
+			decals[shown] |= tile_map.plane('decal_color')[shown].astype(decals.dtype) << 8
+		buffer.blit(self.con)
+
+		if self.look is None:
+			changed = numpy.ones(look.shape, dtype=bool)
+		else:
+			changed = (look != self.look) | (decals != self.decals)
+		self.look = look
+		self.decals = decals
+		return changed
+
+	def draw_objects(self, game):
+		# draw the top object of every cell in the player's FOV, as
+		# draw_cell would, looking only at the visible cells
+		object_index = game.object_index
+		ys, xs = numpy.nonzero(game.fov_mask)
+		for x, y in zip(xs.tolist(), ys.tolist()):
+			obj = object_index.top_at(x, y)
+			if obj is not None:
+				libtcod.console_set_default_foreground(self.con, self.color(obj.color))
+				libtcod.console_put_char(self.con, x, y, obj.char, libtcod.BKGND_NONE)
+
+	def draw_cell(self, game, x, y):
+		# draw the top object on (x, y) if it's in the player's FOV, or
+		# the map tile or decal there
+		obj = game.object_index.top_at(x, y)
+		if obj is not None and game.fov_mask[y, x]:
+			(char, color) = (obj.char, obj.color)
+		else:
+			# what render_map put there
+			buffer = self.buffer
+			char = int(buffer.char[y, x])
+			color = pack(buffer.fore_r[y, x], buffer.fore_g[y, x], buffer.fore_b[y, x])
+		# set the color and draw the appropriate
+		# character at the appropriate location
+		libtcod.console_set_default_foreground(self.con, self.color(color))
+		libtcod.console_put_char(self.con, x, y, char, libtcod.BKGND_NONE)
+
+
+class NullRenderer:
+	# Draws nothing and never closes, for headless runs
+	def is_open(self):
+		return True
+
+	def render(self, game):
+		pass
+
+
+class LibtcodInput:
+	# Keyboard input from the libtcod window
+	def poll(self, block=False):
+		# handle window keys once per frame, 'exit' if esc is pressed. with
+		# block, sleep until a key is pressed unless one is already held
+		if block and self.next_move() is None:
+			key = libtcod.Key()
+			mouse = libtcod.Mouse()
+			libtcod.sys_wait_for_event(libtcod.EVENT_KEY_PRESS, key, mouse, False)
+		else:
+			key = libtcod.console_check_for_keypress()
+		if key.vk == libtcod.KEY_ENTER and key.lalt:
+			# Alt+Enter: toggle fullscreen
+			libtcod.console_set_fullscreen(not libtcod.console_is_fullscreen())
+
+		elif key.vk == libtcod.KEY_ESCAPE:
+			return 'exit'
+
+	def next_move(self):
+		# direction of the held movement key, None if there is none
+		if libtcod.console_is_key_pressed(libtcod.KEY_UP):
+			return (0, -1)
+		elif libtcod.console_is_key_pressed(libtcod.KEY_DOWN):
+			return (0, 1)
+		elif libtcod.console_is_key_pressed(libtcod.KEY_LEFT):
+			return (-1, 0)
+		elif libtcod.console_is_key_pressed(libtcod.KEY_RIGHT):
+			return (1, 0)
+		return None
+
+
+class ScriptedInput:
+	# Plays back moves from any iterable of (dx, dy) or None (wait a
+	# turn), one per player turn, then exits
+	def __init__(self, moves):
+		self.moves = iter(moves)
+		self.done = False
+
+	def poll(self, block=False):
+		if self.done:
+			return 'exit'
+
+	def next_move(self):
+		for move in self.moves:
+			return move
+		self.done = True
+		return None
+
+
+class LibtcodFov:
+	# FOV computed by libtcod's map_compute_fov
+	def __init__(self, algo):
+		self.algo = algo
+		self.fov_map = None
+		self.tile_map = None
+		self.revision = None
+
+	def load(self, tile_map):
+		# take transparency and walkability from the tile map, again
+		# whenever its revision changes
+		if self.fov_map is not None:
+			libtcod.map_delete(self.fov_map)
+		self.fov_map = libtcod.map_new(tile_map.width, tile_map.height)
+		self.tile_map = tile_map
+		self.sync()
+
+	def sync(self):
+		tile_map = self.tile_map
+		self.revision = tile_map.revision
+		libtcod.map_set_properties_rect(self.fov_map, 0, 0, tile_map.width, tile_map.height,
+			tile_map.plane('block_sight') == 0, tile_map.plane('blocked') == 0)
+
+	def compute(self, x, y, radius, light_walls):
+		# height x width bool array of the cells visible from (x, y)
+		if self.revision != self.tile_map.revision:
+			self.sync()
+		libtcod.map_compute_fov(self.fov_map, x, y, radius, light_walls, self.algo)
+		return libtcod.map_get_fov_array(self.fov_map)
+
+
+def default_fov(algo):
+	# libtcod's FOV when the library is available
+	if libtcod is not None:
+		return LibtcodFov(algo)
+	return ShadowcastFov()
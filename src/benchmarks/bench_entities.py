@@ -0,0 +1,143 @@
+# Compare memory per monster and the cost of a simple AI pass (every
+# monster steps towards the player) for the old __dict__ based classes,
+# the game's __slots__ classes, EntityStore views and whole-array updates
+# on the EntityStore.
+#
+#   python benchmarks/bench_entities.py
+from __future__ import print_function
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy
+
+from entities import EntityStore
+from game import BasicMonster, Fighter, Object
+from palette import color_desaturated_green
+
+try:
+	import tracemalloc
+except ImportError:
+	# Python 2
+	tracemalloc = None
+
+MAP_SIZE = 200
+PASSES = 5
+MONSTER_COUNTS = [100, 1000, 10000, 100000]
+
+
+class DictObject:
+	# Object, Fighter and BasicMonster as they were before __slots__
+	def __init__(self, x, y, char, name, color, blocks=False, fighter=None, ai=None, speed=8):
+		self.name = name
+		self.blocks = blocks
+		self.x = x
+		self.y = y
+		self.char = char
+		self.color = color
+		self.layer = 1
+		self.speed = speed
+		self.wait = 0
+		self.game = None
+		self.fighter = fighter
+		if self.fighter:
+			self.fighter.owner = self
+		self.ai = ai
+		if self.ai:
+			self.ai.owner = self
+
+
+class DictFighter:
+	def __init__(self, hp, defense, power):
+		self.max_hp = hp
+		self.hp = hp
+		self.defense = defense
+		self.power = power
+		self.death_function = None
+		self.attack_speed = 20
+
+
+class DictMonster:
+	def __init__(self):
+		self.awake = False
+
+
+def make_dict_objects(positions):
+	return [DictObject(x, y, 'o', 'orc', color_desaturated_green, blocks=True,
+		fighter=DictFighter(10, 0, 3), ai=DictMonster()) for (x, y) in positions]
+
+
+def make_slot_objects(positions):
+	return [Object(x, y, 'o', 'orc', color_desaturated_green, blocks=True,
+		fighter=Fighter(10, 0, 3), ai=BasicMonster()) for (x, y) in positions]
+
+
+def make_store(positions):
+	store = EntityStore()
+	for (x, y) in positions:
+		store.create(x, y, 'o', 'orc', color_desaturated_green, blocks=True, hp=10, power=3,
+			ai=BasicMonster())
+	return store
+
+
+def bytes_per_monster(make, positions):
+	if tracemalloc is None:
+		return float('nan')
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	made = make(positions)
+	after = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return (after - before) / float(len(positions))
+
+
+def step_objects(objects, target_x, target_y):
+	# the per-object loop the AI does: living monsters step towards the target
+	for obj in objects:
+		if obj.fighter.hp > 0:
+			if obj.x != target_x:
+				obj.x += 1 if target_x > obj.x else -1
+			if obj.y != target_y:
+				obj.y += 1 if target_y > obj.y else -1
+
+
+def step_store(store, target_x, target_y):
+	# the same over whole arrays
+	(x, y) = (store.array('x'), store.array('y'))
+	living = (store.array('alive') != 0) & (store.array('hp') > 0)
+	x[living] += numpy.sign(target_x - x[living]).astype(x.dtype)
+	y[living] += numpy.sign(target_y - y[living]).astype(y.dtype)
+
+
+def main():
+	rng = random.Random(0)
+	if tracemalloc is None:
+		print('(memory needs tracemalloc, Python 3)')
+	print('%8s %26s %26s %26s %14s' % ('monsters', 'dict classes (B, us)', 'slot classes (B, us)',
+		'store views (B, us)', 'store (us)'))
+	for count in MONSTER_COUNTS:
+		positions = [(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE)) for i in range(count)]
+		target = (MAP_SIZE // 2, MAP_SIZE // 2)
+
+		dict_objects = make_dict_objects(positions)
+		slot_objects = make_slot_objects(positions)
+		store = make_store(positions)
+		views = [store.view(i) for i in store.ids()]
+
+		def per_monster(func, objects):
+			seconds = timeit.timeit(lambda: func(objects, *target), number=PASSES)
+			return seconds / (PASSES * count) * 1e6
+
+		print('%8d %12.0f %13.3f %12.0f %13.3f %12.0f %13.3f %14.3f' % (count,
+			bytes_per_monster(make_dict_objects, positions), per_monster(step_objects, dict_objects),
+			bytes_per_monster(make_slot_objects, positions), per_monster(step_objects, slot_objects),
+			bytes_per_monster(make_store, positions), per_monster(step_objects, views),
+			per_monster(step_store, store)))
+
+
+if __name__ == '__main__':
+	main()
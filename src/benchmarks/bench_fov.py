@@ -0,0 +1,61 @@
+# Time FOV computations from every floor cell of a generated level:
+# ShadowcastFov without its cache, ShadowcastFov walking the same route
+# twice with its cache, and libtcod's map_compute_fov where the library
+# is available.
+#
+#   python benchmarks/bench_fov.py
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import backends
+from backends import LibtcodFov, NullRenderer, ScriptedInput
+from fov import ShadowcastFov
+from game import FOV_ALGO, FOV_LIGHT_WALLS, TORCH_RADIUS, Game
+
+
+def time_fov(fov, cells, passes=1):
+	start = time.time()
+	for i in range(passes):
+		for (x, y) in cells:
+			fov.compute(x, y, TORCH_RADIUS, FOV_LIGHT_WALLS)
+	return (time.time() - start) / (passes * len(cells))
+
+
+def main():
+	tile_map = Game(NullRenderer(), ScriptedInput([]), seed=0).map
+	cells = [(x, y) for y in range(tile_map.height) for x in range(tile_map.width)
+		if not tile_map.blocked[tile_map.index(x, y)]]
+	print('%d floor cells' % len(cells))
+
+	uncached = ShadowcastFov(cache_size=0)
+	uncached.load(tile_map)
+	print('shadowcast, uncached: %8.1f us' % (time_fov(uncached, cells) * 1e6))
+
+	cached = ShadowcastFov(cache_size=len(cells))
+	cached.load(tile_map)
+	print('shadowcast, cached:   %8.1f us (2 passes)' % (time_fov(cached, cells, passes=2) * 1e6))
+
+	if backends.libtcod is None:
+		print('libtcod:              not available on this platform')
+		return
+
+	libtcod_fov = LibtcodFov(FOV_ALGO)
+	libtcod_fov.load(tile_map)
+	print('libtcod:              %8.1f us' % (time_fov(libtcod_fov, cells) * 1e6))
+
+	# how often the two disagree
+	differing = 0
+	for (x, y) in cells:
+		a = uncached.compute(x, y, TORCH_RADIUS, FOV_LIGHT_WALLS)
+		b = libtcod_fov.compute(x, y, TORCH_RADIUS, FOV_LIGHT_WALLS)
+		differing += (a != b).sum()
+	print('cells differing from libtcod: %.2f per FOV' % (differing / float(len(cells))))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,51 @@
+# Run the game headless, with the null renderer and a random walk for
+# input, and report how many game ticks and player turns run per second.
+#
+#   python benchmarks/bench_headless.py [ticks]
+from __future__ import print_function
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from backends import NullRenderer, ScriptedInput
+from game import Game
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+class RandomWalk:
+	# endless random moves, counting how many were made
+	def __init__(self, seed):
+		self.rng = random.Random(seed)
+		self.moves = 0
+
+	def __iter__(self):
+		while True:
+			self.moves += 1
+			yield self.rng.choice(DIRECTIONS)
+
+
+def main():
+	ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	walk = RandomWalk(0)
+
+	game = Game(NullRenderer(), ScriptedInput(walk), seed=0)
+	games = 1
+	start = time.time()
+	for tick in range(ticks):
+		if game.game_state == 'dead':
+			game.new_game()
+			games += 1
+		game.step()
+	elapsed = time.time() - start
+
+	print('%d ticks, %d player turns, %d games in %.2fs' % (ticks, walk.moves, games, elapsed))
+	print('%.0f ticks/s, %.0f player turns/s' % (ticks / elapsed, walk.moves / elapsed))
+
+
+if __name__ == '__main__':
+	main()
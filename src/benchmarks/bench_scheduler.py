@@ -0,0 +1,72 @@
+# Compare the cost of one game tick with the old per-frame wait countdown
+# against the Scheduler heap, for growing numbers of monsters. Monsters
+# act at the same overall rate (about ACTIONS_PER_TICK per tick) at every
+# size, so only the bookkeeping cost changes.
+#
+#   python benchmarks/bench_scheduler.py
+from __future__ import print_function
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from scheduler import Scheduler
+
+TICKS = 200
+ACTIONS_PER_TICK = 10
+MONSTER_COUNTS = [10, 100, 1000, 10000, 100000]
+
+
+class Monster:
+	def __init__(self, speed):
+		self.speed = speed
+		self.wait = 0
+		self.ai = True
+
+	def take_turn(self):
+		self.wait = self.speed
+
+
+def countdown_ticks(objects):
+	# the main loop before the scheduler
+	for tick in range(TICKS):
+		for obj in objects:
+			if obj.ai:
+				if obj.wait > 0:
+					obj.wait -= 1
+				else:
+					obj.take_turn()
+
+
+def scheduler_ticks(scheduler):
+	for tick in range(TICKS):
+		for obj in scheduler.pop_due():
+			obj.wait = 0
+			obj.take_turn()
+			scheduler.schedule(obj, max(obj.wait, 1))
+		scheduler.tick()
+
+
+def main():
+	rng = random.Random(0)
+	print('%8s %16s %16s' % ('monsters', 'countdown (us)', 'scheduler (us)'))
+	for count in MONSTER_COUNTS:
+		speed = max(count // ACTIONS_PER_TICK, 1)
+
+		objects = [Monster(speed) for i in range(count)]
+		scheduler = Scheduler()
+		for obj in objects:
+			# spread the first turns out
+			obj.wait = rng.randrange(speed)
+			scheduler.schedule(obj, obj.wait)
+
+		countdown = timeit.timeit(lambda: countdown_ticks(objects), number=1) / TICKS
+		heap = timeit.timeit(lambda: scheduler_ticks(scheduler), number=1) / TICKS
+		print('%8d %16.1f %16.1f' % (count, countdown * 1e6, heap * 1e6))
+
+
+if __name__ == '__main__':
+	main()
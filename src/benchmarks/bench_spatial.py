@@ -0,0 +1,62 @@
+# Compare blocked-cell lookups through SpatialIndex against the old scan
+# of the whole object list, for growing numbers of monsters.
+#
+#   python benchmarks/bench_spatial.py
+from __future__ import print_function
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from spatial import LAYER_ACTORS, SpatialIndex
+
+MAP_SIZE = 200
+LOOKUPS = 1000
+MONSTER_COUNTS = [10, 100, 1000, 10000]
+
+
+class Monster:
+	def __init__(self, x, y):
+		self.x = x
+		self.y = y
+		self.blocks = True
+		self.fighter = True
+		self.layer = LAYER_ACTORS
+
+
+def list_is_blocked(objects, x, y):
+	# the lookup is_blocked used to do
+	for obj in objects:
+		if obj.blocks and obj.x == x and obj.y == y:
+			return True
+	return False
+
+
+def main():
+	rng = random.Random(0)
+	print('%8s %14s %14s %10s' % ('monsters', 'list (us)', 'index (us)', 'speedup'))
+	for count in MONSTER_COUNTS:
+		objects = [Monster(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE)) for i in range(count)]
+		index = SpatialIndex()
+		for obj in objects:
+			index.add(obj)
+		cells = [(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE)) for i in range(LOOKUPS)]
+
+		def scan():
+			for (x, y) in cells:
+				list_is_blocked(objects, x, y)
+
+		def lookup():
+			for (x, y) in cells:
+				index.is_blocked(x, y)
+
+		list_time = min(timeit.repeat(scan, number=1, repeat=3)) / LOOKUPS
+		index_time = min(timeit.repeat(lookup, number=1, repeat=3)) / LOOKUPS
+		print('%8d %14.3f %14.3f %9.0fx' % (count, list_time * 1e6, index_time * 1e6, list_time / index_time))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,214 @@
+import array
+
+import numpy
+
+from game import DEFAULT_ATTACK_SPEED, DEFAULT_SPEED, Fighter, Object
+from spatial import LAYER_ACTORS
+
+# the per-entity values an EntityStore keeps, one typed array each, as
+# (name, array.array typecode)
+FIELDS = [
+	('x', 'i'), ('y', 'i'), ('char', 'i'), ('color', 'i'), ('layer', 'b'), ('blocks', 'B'),
+	('speed', 'i'), ('wait', 'i'), ('has_fighter', 'B'), ('hp', 'i'), ('max_hp', 'i'),
+	('power', 'i'), ('defense', 'i'), ('attack_speed', 'i'), ('alive', 'B'),
+]
+
+
+class EntityStore:
+	# Struct-of-arrays storage for many entities: every value is one slot of
+	# an array.array indexed by entity id, so an entity costs a few dozen
+	# bytes. array(name) gives a NumPy view of a whole field, for loops
+	# over every entity at once, and view(id) an Object-like handle on a
+	# single entity
+	def __init__(self, capacity=64):
+		self.capacity = capacity
+		for (name, typecode) in FIELDS:
+			setattr(self, name, array.array(typecode, [0]) * capacity)
+		self.arrays = {}
+		# values that aren't numbers, by id
+		self.names = [None] * capacity
+		self.ais = [None] * capacity
+		self.death_functions = [None] * capacity
+		self.games = [None] * capacity
+		# ids in use are below count; freed ids get reused first
+		self.count = 0
+		self.free = []
+
+	def grow(self):
+		# double the capacity of every field. the NumPy views share memory
+		# with the old arrays, so they are made again on demand
+		for (name, typecode) in FIELDS:
+			old = getattr(self, name)
+			setattr(self, name, old + array.array(typecode, [0]) * self.capacity)
+		self.arrays = {}
+		self.names.extend([None] * self.capacity)
+		self.ais.extend([None] * self.capacity)
+		self.death_functions.extend([None] * self.capacity)
+		self.games.extend([None] * self.capacity)
+		self.capacity *= 2
+
+	def array(self, name):
+		# NumPy view of a field for ids below count, sharing its memory
+		view = self.arrays.get(name)
+		if view is None or len(view) != self.count:
+			values = getattr(self, name)
+			view = self.arrays[name] = numpy.frombuffer(values, dtype=values.typecode)[:self.count]
+		return view
+
+	def create(self, x, y, char, name, color, blocks=False, speed=DEFAULT_SPEED, layer=LAYER_ACTORS,
+			hp=None, defense=0, power=0, death_function=None, attack_speed=DEFAULT_ATTACK_SPEED, ai=None):
+		# add an entity and return its id. it is a fighter if hp is given
+		if self.free:
+			i = self.free.pop()
+		else:
+			if self.count == self.capacity:
+				self.grow()
+			i = self.count
+			self.count += 1
+
+		self.x[i] = x
+		self.y[i] = y
+		self.char[i] = ord(char)
+		self.color[i] = color
+		self.layer[i] = layer
+		self.blocks[i] = 1 if blocks else 0
+		self.speed[i] = speed
+		self.wait[i] = 0
+		self.has_fighter[i] = 0 if hp is None else 1
+		self.hp[i] = self.max_hp[i] = hp or 0
+		self.defense[i] = defense
+		self.power[i] = power
+		self.attack_speed[i] = attack_speed
+		self.alive[i] = 1
+		self.names[i] = name
+		self.ais[i] = ai
+		self.death_functions[i] = death_function
+		self.games[i] = None
+		if ai is not None:
+			ai.owner = self.view(i)
+		return i
+
+	def destroy(self, i):
+		# free an id for reuse
+		self.alive[i] = 0
+		self.names[i] = None
+		self.ais[i] = None
+		self.death_functions[i] = None
+		self.games[i] = None
+		self.free.append(i)
+
+	def ids(self):
+		# array of the ids in use
+		return numpy.nonzero(self.array('alive'))[0]
+
+	def view(self, i):
+		return EntityView(self, i)
+
+	def __len__(self):
+		return self.count - len(self.free)
+
+
+def store_field(name, get_value=None, set_value=None):
+	# property of a view (anything with store and id) reading and writing
+	# one of the store's arrays, converting with get_value and set_value
+	def get(self):
+		value = getattr(self.store, name)[self.id]
+		return get_value(value) if get_value else value
+	def set(self, value):
+		getattr(self.store, name)[self.id] = set_value(value) if set_value else value
+	return property(get, set)
+
+
+class EntityView(object):
+	# Object-compatible handle on one entity of an EntityStore. It holds no
+	# values itself, so views can be made and dropped freely. Its methods
+	# are Object's own, so a view can be added to a Game and driven by
+	# BasicMonster like any Object
+	__slots__ = ('store', 'id')
+
+	def __init__(self, store, i):
+		self.store = store
+		self.id = i
+
+	x = store_field('x')
+	y = store_field('y')
+	char = store_field('char', chr, ord)
+	color = store_field('color')
+	layer = store_field('layer')
+	blocks = store_field('blocks', bool)
+	speed = store_field('speed')
+	wait = store_field('wait')
+
+	def get_name(self):
+		return self.store.names[self.id]
+	def set_name(self, value):
+		self.store.names[self.id] = value
+	name = property(get_name, set_name)
+
+	def get_ai(self):
+		return self.store.ais[self.id]
+	def set_ai(self, value):
+		self.store.ais[self.id] = value
+		if value is not None:
+			value.owner = self
+	ai = property(get_ai, set_ai)
+
+	def get_fighter(self):
+		# None if the entity can't fight, like Object.fighter
+		if self.store.has_fighter[self.id]:
+			return FighterView(self)
+		return None
+	fighter = property(get_fighter)
+
+	def get_game(self):
+		# set by Game.add_object. Game.remove_object clears it, which frees
+		# the entity's id, so a dead monster stops counting as alive
+		return self.store.games[self.id]
+	def set_game(self, value):
+		if value is None and self.store.games[self.id] is not None:
+			self.store.destroy(self.id)
+			return
+		self.store.games[self.id] = value
+	game = property(get_game, set_game)
+
+	move = Object.__dict__['move']
+	move_towards = Object.__dict__['move_towards']
+	distance_to = Object.__dict__['distance_to']
+	set_layer = Object.__dict__['set_layer']
+
+	def __eq__(self, other):
+		return isinstance(other, EntityView) and other.store is self.store and other.id == self.id
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash((id(self.store), self.id))
+
+
+class FighterView(object):
+	# Fighter-compatible handle on the combat values of an entity
+	__slots__ = ('store', 'id')
+
+	def __init__(self, owner):
+		self.store = owner.store
+		self.id = owner.id
+
+	hp = store_field('hp')
+	max_hp = store_field('max_hp')
+	power = store_field('power')
+	defense = store_field('defense')
+	attack_speed = store_field('attack_speed')
+
+	def get_death_function(self):
+		return self.store.death_functions[self.id]
+	def set_death_function(self, value):
+		self.store.death_functions[self.id] = value
+	death_function = property(get_death_function, set_death_function)
+
+	def get_owner(self):
+		return EntityView(self.store, self.id)
+	owner = property(get_owner)
+
+	take_damage = Fighter.__dict__['take_damage']
+	attack = Fighter.__dict__['attack']
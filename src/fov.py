@@ -0,0 +1,116 @@
+from collections import OrderedDict
+
+import numpy
+
+# transforms from the first octant to each of the eight octants:
+# (xx, xy, yx, yy) so that map x = x + col * xx + row * xy, map y = y + col * yx + row * yy
+OCTANTS = [
+	(1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+	(-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+]
+
+
+class ShadowcastFov:
+	# Recursive shadowcasting FOV in plain Python, with the same radius and
+	# light_walls meaning as libtcod's map_compute_fov. Results are cached
+	# by (origin, radius, light_walls, map revision), so standing still or
+	# walking back over recent cells doesn't recompute anything
+	def __init__(self, cache_size=64):
+		self.cache_size = cache_size
+		self.cache = OrderedDict()
+		self.tile_map = None
+
+	def load(self, tile_map):
+		# block_sight is read from the tile map on every compute
+		self.tile_map = tile_map
+		self.cache.clear()
+
+	def compute(self, x, y, radius, light_walls):
+		# height x width bool array of the cells visible from (x, y). The
+		# array may be shared with later calls, so it is read-only
+		key = (x, y, radius, light_walls, self.tile_map.revision)
+		mask = self.cache.get(key)
+		if mask is not None:
+			# most recently used goes last
+			del self.cache[key]
+			self.cache[key] = mask
+			return mask
+
+		mask = self.shadowcast(x, y, radius, light_walls)
+		mask.flags.writeable = False
+		if self.cache_size > 0:
+			self.cache[key] = mask
+			if len(self.cache) > self.cache_size:
+				self.cache.popitem(last=False)
+		return mask
+
+	def shadowcast(self, x, y, radius, light_walls):
+		width = self.tile_map.width
+		height = self.tile_map.height
+		if radius <= 0:
+			# no limit, like libtcod
+			radius = width + height
+
+		lit = bytearray(width * height)
+		lit[y * width + x] = 1
+		for octant in OCTANTS:
+			self.cast_light(lit, x, y, 1, 1.0, 0.0, radius, octant)
+
+		if not light_walls:
+			# only cells you can see through stay visible, plus the origin
+			opaque = self.tile_map.block_sight
+			lit = bytearray(l & (o ^ 1) for (l, o) in zip(lit, opaque))
+			lit[y * width + x] = 1
+
+		return numpy.frombuffer(lit, dtype=numpy.uint8).astype(bool).reshape(height, width)
+
+	def cast_light(self, lit, x, y, row, start, end, radius, octant):
+		# light the cells of one octant between the slopes start and end,
+		# from row outwards, recursing below each wall
+		if start < end:
+			return
+		(xx, xy, yx, yy) = octant
+		width = self.tile_map.width
+		height = self.tile_map.height
+		opaque = self.tile_map.block_sight
+		radius_squared = radius * radius
+
+		for j in range(row, radius + 1):
+			blocked = False
+			new_start = start
+			dx = -j - 1
+			dy = -j
+			while dx <= 0:
+				dx += 1
+				# slopes of the cell's left and right edges
+				l_slope = (dx - 0.5) / (dy + 0.5)
+				r_slope = (dx + 0.5) / (dy - 0.5)
+				if start < r_slope:
+					continue
+				elif end > l_slope:
+					break
+
+				mx = x + dx * xx + dy * xy
+				my = y + dx * yx + dy * yy
+				if 0 <= mx < width and 0 <= my < height:
+					i = my * width + mx
+					if dx * dx + dy * dy <= radius_squared:
+						lit[i] = 1
+					wall = opaque[i]
+				else:
+					wall = True
+
+				if blocked:
+					# scanning a run of walls
+					if wall:
+						new_start = r_slope
+					else:
+						blocked = False
+						start = new_start
+				elif wall and j < radius:
+					# start of a run of walls, light what's behind it first
+					blocked = True
+					self.cast_light(lit, x, y, j + 1, start, l_slope, radius, octant)
+					new_start = r_slope
+			if blocked:
+				break
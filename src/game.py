@@ -1,5 +1,15 @@
-import libtcodpy as libtcod
 import math
+import random
+
+import numpy
+
+from backends import LibtcodInput, LibtcodRenderer, default_fov
+from palette import color_dark_red, color_darker_green, color_desaturated_green, color_white, palette
+from messages import MessageLog
+from pathing import DistanceField
+from scheduler import Scheduler
+from spatial import LAYER_ACTORS, LAYER_PLAYER, SpatialIndex
+from tilemap import TileMap
 
 SCREEN_WIDTH = 80
 SCREEN_HEIGHT = 50
@@ -18,31 +28,45 @@ TORCH_RADIUS = 10
 
 MAX_ROOM_MONSTERS = 3
 
+# sleeping monsters wake when they come into view, when the player
+# comes this close, or when a fight makes noise this close to them
+WAKE_RADIUS = 5
+NOISE_RADIUS = 8
+
+# messages kept in the game's message log
+MESSAGE_LOG_SIZE = 100
+
 # game speeds
 PLAYER_SPEED = 2
 DEFAULT_SPEED = 8
 DEFAULT_ATTACK_SPEED = 20
 
-color_dark_wall = libtcod.Color(0, 0, 100)
-color_light_wall = libtcod.Color(130, 110, 50)
-color_dark_ground = libtcod.Color(50, 50, 150)
-color_light_ground = libtcod.Color(200, 180, 50)
 
 
 
-class Object:
+class Object(object):
 	# Generic object used for various game features
 	# always represented by a character in console
-	def __init__(self, x, y, char, name, color, blocks=False, fighter=None, ai=None, speed=DEFAULT_SPEED):
+	# (__slots__ leave out the per-instance __dict__, for big levels)
+	__slots__ = ('name', 'blocks', 'x', 'y', 'char', 'color', 'layer', 'speed', 'wait',
+		'game', 'fighter', 'ai')
+
+	def __init__(self, x, y, char, name, color, blocks=False, fighter=None, ai=None, speed=DEFAULT_SPEED,
+			layer=LAYER_ACTORS):
 		self.name = name
 		self.blocks = blocks
 		self.x = x
 		self.y = y
 		self.char = char
 		self.color = color
+		# objects on higher layers are drawn on top (see spatial.py)
+		self.layer = layer
 		self.speed = speed
 		self.wait = 0
 
+		# set by Game.add_object
+		self.game = None
+
 		self.fighter = fighter
 		if self.fighter:
 			self.fighter.owner = self
@@ -53,23 +77,11 @@ class Object:
 
 	def move(self, dx, dy):
 		# move object by (dx, dy) unless blocked
-		if not is_blocked(self.x + dx, self.y + dy):
-			self.x += dx
-			self.y += dy
-		
-		self.wait = self.speed
-
-	def draw(self):
-		# if an object is in player's FOV
-		if libtcod.map_is_in_fov(fov_map, self.x, self.y):
-			# set object color and draw the appropriate
-			# character at the appropriate location
-			libtcod.console_set_default_foreground(con, self.color)
-			libtcod.console_put_char(con, self.x, self.y, self.char, libtcod.BKGND_NONE)
+		if not self.game.is_blocked(self.x + dx, self.y + dy):
+			self.game.object_index.move(self, self.x + dx, self.y + dy)
+			self.game.revision += 1
 
-	def clear(self):
-		# clear the object's character from console
-		libtcod.console_put_char(con, self.x, self.y, ' ', libtcod.BKGND_NONE)
+		self.wait = self.speed
 
 	def move_towards(self, target_x, target_y):
 		# vector from this object to the target
@@ -88,23 +100,10 @@ class Object:
 		dy = other.y - self.y
 		return math.sqrt(dx ** 2 + dy ** 2)
 
-	def send_to_back(self):
-		# this object will now be drawn first, so other objects will be drawn on top
-		global objects
-		objects.remove(self)
-		objects.insert(0, self)
-
-
-class Tile:
-	# A map tile and its properties
-	def __init__(self, blocked, block_sight = None):
-		self.explored = False
-
-		self.blocked = blocked
-
-		# by default, if a tile is blocked, it also blocks sight
-		if block_sight is None: block_sight = blocked
-		self.block_sight = block_sight
+	def set_layer(self, layer):
+		# draw this object on another render layer, e.g. LAYER_ITEMS to
+		# have other objects drawn on top of it
+		self.game.object_index.set_layer(self, layer)
 
 
 class Rect:
@@ -116,8 +115,8 @@ class Rect:
 		self.y2 = y + h
 
 	def center(self):
-		center_x = (self.x1 + self.x2) / 2
-		center_y = (self.y1 + self.y2) / 2
+		center_x = (self.x1 + self.x2) // 2
+		center_y = (self.y1 + self.y2) // 2
 		return (center_x, center_y)
 
 	def intersect(self, other):
@@ -126,8 +125,10 @@ class Rect:
 				self.y1 <= other.y2 and self.y2 >= other.y1)
 
 
-class Fighter:
+class Fighter(object):
 	# combat-related properties and methods (monster, player, npc)
+	__slots__ = ('owner', 'max_hp', 'hp', 'defense', 'power', 'death_function', 'attack_speed')
+
 	def __init__(self, hp, defense, power, death_function=None, attack_speed=DEFAULT_ATTACK_SPEED):
 		self.max_hp = hp
 		self.hp = hp
@@ -148,326 +149,348 @@ class Fighter:
 
 	def attack(self, target):
 		damage = self.power - target.fighter.defense
+		self.owner.wait = self.attack_speed
+		self.owner.game.make_noise(self.owner.x, self.owner.y, NOISE_RADIUS)
+		self.owner.game.revision += 1
 
 		if damage > 0:
-			print self.owner.name.capitalize() + ' attacks ' + target.name + ' for ' + str(damage) + ' hit points.'
+			self.owner.game.log.add('%s attacks %s for %d hit points.', (self.owner.name, target.name, damage))
 			target.fighter.take_damage(damage)
 		else:
-			print self.owner.name.capitalize() + ' attacks ' + target.name + ' but it has no effect!'
+			self.owner.game.log.add('%s attacks %s but it has no effect!', (self.owner.name, target.name))
 
 
-class BasicMonster:
+class BasicMonster(object):
 	# AI for a basic monster
+	__slots__ = ('owner', 'awake', 'heard')
+
+	def __init__(self):
+		# only awake monsters get turns
+		self.awake = False
+		# whether it is on its way to the last noise it heard
+		self.heard = False
+
 	def take_turn(self):
 		monster = self.owner
-		if libtcod.map_is_in_fov(fov_map, monster.x, monster.y):
+		game = monster.game
+		player = game.player
+		if game.fov_mask[monster.y, monster.x] and player.fighter.hp > 0:
 			# if not close enough to attack, move closer
-			if monster.distance_to(player) >= 2:
-				monster.move_towards(player.x, player.y)
-			# if it's close enough and the player is alive, attack
-			elif player.fighter.hp > 0:
+			if game.player_distance.distance(monster.x, monster.y) >= 2:
+				(dx, dy) = game.player_distance.downhill(monster.x, monster.y, game.is_blocked)
+				monster.move(dx, dy)
+			# if it's close enough, attack
+			else:
 				monster.fighter.attack(player)
+		elif self.heard:
+			# go and see what made the last noise, giving up once there or stuck
+			if not self.step_towards(game.noise_distance):
+				self.heard = False
+		elif monster.distance_to(player) > WAKE_RADIUS or not self.step_towards(game.player_distance):
+			# lost the player, or can't get any closer: fall back asleep
+			self.awake = False
+
+	def step_towards(self, field):
+		# one step down a DistanceField towards its goal, false if no step helps
+		monster = self.owner
+		(dx, dy) = field.downhill(monster.x, monster.y, monster.game.is_blocked)
+		if (dx, dy) == (0, 0):
+			return False
+		monster.move(dx, dy)
+		return True
 
 
+def player_death(player):
+	# Game Over!
+	player.game.log.add('You died!', color=color_dark_red)
+	player.game.game_state = 'dead'
+	player.game.revision += 1
 
-def handle_keys():
-	global fov_recompute
-
-	key = libtcod.console_check_for_keypress()
-	if key.vk == libtcod.KEY_ENTER and key.lalt:
-		# Alt+Enter: toggle fullscreen
-		libtcod.console_set_fullscreen(not libtcod.console_is_fullscreen())
-
-	elif key.vk == libtcod.KEY_ESCAPE:
-		return 'exit'		# exit game
-
-	if game_state == 'playing':
-		if player.wait > 1: # still waiting, don't take turn
-			player.wait -= 1
-			return
-		
-		#movement keys
-		if libtcod.console_is_key_pressed(libtcod.KEY_UP):
-			player_move_or_attack(0, -1)
-			fov_recompute = True
-
-		elif libtcod.console_is_key_pressed(libtcod.KEY_DOWN):
-			player_move_or_attack(0, 1)
-			fov_recompute = True
-
-		elif libtcod.console_is_key_pressed(libtcod.KEY_LEFT):
-			player_move_or_attack(-1, 0)
-			fov_recompute = True
-
-		elif libtcod.console_is_key_pressed(libtcod.KEY_RIGHT):
-			player_move_or_attack(1, 0)
-			fov_recompute = True
-		else:
-			return 'didnt-take-turn'
-
-
-def make_map():
-	global map
-
-	# fill map with blocked tiles
-	map = [[ Tile(True)
-		for y in range(MAP_HEIGHT) ]
-			for x in range(MAP_WIDTH) ]
-
-	rooms = []
-	num_rooms = 0
-
-	for r in range(MAX_ROOMS):
-		# random width and height
-		w = libtcod.random_get_int(0, ROOM_MIN_SIZE, ROOM_MAX_SIZE)
-		h = libtcod.random_get_int(0, ROOM_MIN_SIZE, ROOM_MAX_SIZE)
-		# random positions without going out of bounds
-		x = libtcod.random_get_int(0, 0, MAP_WIDTH - w - 1)
-		y = libtcod.random_get_int(0, 0, MAP_HEIGHT - h - 1)
+	player.char = '%'
+	player.color = color_dark_red
+	player.game.object_index.touch(player)
 
-		new_room = Rect(x, y, w, h)
 
-		# see if new room intersects with previously created rooms
-		failed = False
-		for other_room in rooms:
-			if new_room.intersect(other_room):
-				failed = True
+def monster_death(monster):
+	# leaves a corpse on the map and stops being an object
+	game = monster.game
+	game.log.add('%s is dead!', (monster.name,), color=color_dark_red)
+	game.map.add_decal(monster.x, monster.y, '%', palette.index('dark_red'))
+	game.scheduler.cancel(monster)
+	game.remove_object(monster)
+	game.revision += 1
+
+
+
+class Game:
+	# A game in progress: the map, the objects on it and the turn loop.
+	# Drawing and input go through the renderer and input backends (see
+	# backends.py), so the same game runs in a window or headless
+	def __init__(self, renderer, input, fov=None, seed=None, log_file=None):
+		self.renderer = renderer
+		self.input = input
+		if fov is None:
+			fov = default_fov(FOV_ALGO)
+		self.fov = fov
+		self.rng = random.Random(seed)
+		# kept across new games
+		self.log = MessageLog(MESSAGE_LOG_SIZE, log_file)
+
+		self.new_game()
+
+	def new_game(self):
+		# create player object
+		fighter_component = Fighter(hp=30, defense=2, power=5, death_function=player_death)
+		self.player = Object(0, 0, '@', 'player', color_white, blocks=True, fighter=fighter_component, speed=PLAYER_SPEED,
+			layer=LAYER_PLAYER)
+
+		# every object on the map, by cell and by render layer
+		self.object_index = SpatialIndex()
+		self.add_object(self.player)
+
+		self.scheduler = Scheduler()
+		self.scheduler.schedule(self.player, 0, wake=False)
+
+		self.make_map()
+		self.fov.load(self.map)
+
+		self.player_distance = DistanceField(self.map)
+		self.player_distance.set_goal(self.player.x, self.player.y)
+		# the way to the last noise, for monsters that heard it
+		self.noise_distance = DistanceField(self.map)
+
+		# bumped on every change a renderer could show (moves, attacks,
+		# deaths, FOV recomputes), so frames where nothing changed can be skipped
+		self.revision = 0
+		# bumped on every FOV recompute, so renderers know to redraw the map
+		self.fov_revision = 0
+		self.recompute_fov()
+
+		self.game_state = 'playing'
+
+	def add_object(self, obj):
+		obj.game = self
+		self.object_index.add(obj)
+
+	def remove_object(self, obj):
+		self.object_index.remove(obj)
+		obj.game = None
+
+	def run(self):
+		# play until the renderer closes or the input exits
+		while self.renderer.is_open():
+			if not self.step():
 				break
+		self.log.close()
+
+	def step(self):
+		# one frame: draw, read input, then let everyone whose turn has
+		# come act. False once the input asks to exit
+		self.renderer.render(self)
+
+		# when only the player's input can change anything, the input
+		# backend may block until it arrives. once the game is over no
+		# turns are played, so monsters still waiting for theirs don't count
+		idle = self.game_state != 'playing' or (
+			not self.scheduler.pending() and self.scheduler.is_due(self.player))
+		if self.input.poll(block=idle) == 'exit':
+			return False
+
+		if self.game_state == 'playing':
+			if self.scheduler.is_due(self.player):
+				move = self.input.next_move()
+				if move is not None:
+					self.player_move_or_attack(*move)
+					# next turn comes once the move or attack is over
+					self.scheduler.schedule(self.player, self.player.wait, wake=False)
+
+			# let awake monsters whose turn has come act
+			for obj in self.scheduler.pop_due():
+				obj.wait = 0
+				obj.ai.take_turn()
+				# a monster that didn't act waits a turn of its own speed
+				# before looking again, a sleeping one waits for wake_monster
+				if obj.ai.awake:
+					self.scheduler.schedule(obj, max(obj.wait, obj.speed))
+
+			self.scheduler.tick()
 
-		if not failed:
-			# room is valid, so create it
-			create_room(new_room)
-
-			(new_x, new_y) = new_room.center()
-
-			if num_rooms == 0:
-				# center player in first room
-				player.x = new_x
-				player.y = new_y
-
-			else: # connect new room to previously created room
-				# center of previous room
-				(prev_x, prev_y) = rooms[num_rooms - 1].center()
-
-				# flip a coin to start with horizontal or vertical tunnel
-				if libtcod.random_get_int(0, 0, 1) == 1:
-					# first horizontal, then vertical
-					create_h_tunnel(prev_x, new_x, prev_y)
-					create_v_tunnel(prev_y, new_y, new_x)
-				else:
-					# first vertical, then horizontal
-					create_v_tunnel(prev_y, new_y, prev_x)
-					create_h_tunnel(prev_x, new_x, new_y)
-
-			# add objects to the new room
-			place_objects(new_room)
-
-			# append new room to list
-			rooms.append(new_room)
-			num_rooms += 1
-
-
-
-def render_all():
-	global fov_map, color_dark_wall, color_light_wall
-	global color_dark_ground, color_light_ground
-	global fov_recompute
-
-	if fov_recompute:
-		fov_recompute = False
-		libtcod.map_compute_fov(fov_map, player.x, player.y, TORCH_RADIUS, FOV_LIGHT_WALLS, FOV_ALGO)
-
-		# set tile colors according to FOV
-		for y in range(MAP_HEIGHT):
-			for x in range(MAP_WIDTH):
-				visible = libtcod.map_is_in_fov(fov_map, x, y)
-				wall = map[x][y].block_sight
-				if not visible: # out of FOV
-					# if not visible right now, player can only see it if it's been explored
-					if map[x][y].explored:
-						if wall:
-							libtcod.console_set_char_background(con, x, y, color_dark_wall, libtcod.BKGND_SET)
-						else:
-							libtcod.console_set_char_background(con, x, y, color_dark_ground, libtcod.BKGND_SET)
-				else:
-					if wall:
-						libtcod.console_set_char_background(con, x, y, color_light_wall, libtcod.BKGND_SET)
-					else:
-						libtcod.console_set_char_background(con, x, y, color_light_ground, libtcod.BKGND_SET)
-					map[x][y].explored = True
-
-
-	# draw all objects in object list
-	for object in objects:
-		if object != player:
-			object.draw()
-	player.draw()
-
-	# blit contents of "con" to the root console
-	libtcod.console_blit(con, 0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, 0, 0, 0)
-
-	# show the player's stats
-	libtcod.console_set_default_foreground(con, libtcod.white)
-	libtcod.console_print_ex(con, 1, SCREEN_HEIGHT - 2, libtcod.BKGND_NONE, libtcod.LEFT,
-		'HP: ' + str(player.fighter.hp) + '/' + str(player.fighter.max_hp))
-
-
-def create_room(room):
-	global map
-	# make tiles within rectangle able to be traversed
-	for x in range(room.x1 + 1, room.x2):
-		for y in range(room.y1 + 1, room.y2):
-			map[x][y].blocked = False
-			map[x][y].block_sight = False
-
-
-def create_h_tunnel(x1, x2, y):
-	global map
-	for x in range(min(x1, x2), max(x1, x2) + 1):
-		map[x][y].blocked = False
-		map[x][y].block_sight = False
-
-
-def create_v_tunnel(y1, y2, x):
-	global map
-	for y in range(min(y1, y2), max(y1, y2) + 1):
-		map[x][y].blocked = False
-		map[x][y].block_sight = False
-
-
-def place_objects(room):
-	# choose random number of monsters
-	num_monsters = libtcod.random_get_int(0, 0, MAX_ROOM_MONSTERS)
-
-	for i in range(num_monsters):
-		# choose random spot for this monster
-		x = libtcod.random_get_int(0, room.x1, room.x2)
-		y = libtcod.random_get_int(0, room.y1, room.y2)
-
-		# place if tile is not blocked
-		if not is_blocked(x, y):
-			if libtcod.random_get_int(0, 0, 100) < 80: # 80% chance of getting an orc
-				# create orc
-				fighter_component = Fighter(hp=10, defense=0, power=3, death_function=monster_death)
-				ai_component = BasicMonster()
-				monster = Object(x, y, 'o', 'orc', libtcod.desaturated_green,
-					blocks=True, fighter=fighter_component, ai=ai_component)
-			else:
-				# create a troll
-				fighter_component = Fighter(hp=16, defense=1, power=4, death_function=monster_death)
-				ai_component = BasicMonster()
-				monster = Object(x, y, 'T', 'troll', libtcod.darker_green,
-					blocks=True, fighter=fighter_component, ai=ai_component)
-
-			objects.append(monster)
-
-
-def is_blocked(x, y):
-	# test the tile map
-	if map[x][y].blocked:
 		return True
 
-	# check for blocking objects
-	for obj in objects:
-		if obj.blocks and obj.x == x and obj.y == y:
-			return True
+	def make_map(self):
+		rng = self.rng
 
-	return False
+		# fill map with blocked tiles
+		self.map = TileMap(MAP_WIDTH, MAP_HEIGHT, blocked=True)
 
+		rooms = []
+		num_rooms = 0
 
-def player_move_or_attack(dx, dy):
-	global fov_recompute
+		for r in range(MAX_ROOMS):
+			# random width and height
+			w = rng.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+			h = rng.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+			# random positions without going out of bounds
+			x = rng.randint(0, MAP_WIDTH - w - 1)
+			y = rng.randint(0, MAP_HEIGHT - h - 1)
 
-	# direction player is moving or attacking
-	x = player.x + dx
-	y = player.y + dy
+			new_room = Rect(x, y, w, h)
 
-	# look for attackable object
-	target = None
-	for obj in objects:
-		if obj.fighter and obj.x == x and obj.y == y:
-			target = obj
-			break
+			# see if new room intersects with previously created rooms
+			failed = False
+			for other_room in rooms:
+				if new_room.intersect(other_room):
+					failed = True
+					break
 
-	# attack if target found, move otherwise
-	if target is not None:
-		player.fighter.attack(target)
-	else:
-		player.move(dx, dy)
-		fov_recompute = True
+			if not failed:
+				# room is valid, so create it
+				self.create_room(new_room)
 
+				(new_x, new_y) = new_room.center()
 
-def player_death(player):
-	# Game Over!
-	global game_state
+				if num_rooms == 0:
+					# center player in first room
+					self.object_index.move(self.player, new_x, new_y)
 
-	print 'You died!'
-	game_state = 'dead'
+				else: # connect new room to previously created room
+					# center of previous room
+					(prev_x, prev_y) = rooms[num_rooms - 1].center()
 
-	player.char = '%'
-	player.color = libtcod.dark_red
+					# flip a coin to start with horizontal or vertical tunnel
+					if rng.randint(0, 1) == 1:
+						# first horizontal, then vertical
+						self.create_h_tunnel(prev_x, new_x, prev_y)
+						self.create_v_tunnel(prev_y, new_y, new_x)
+					else:
+						# first vertical, then horizontal
+						self.create_v_tunnel(prev_y, new_y, prev_x)
+						self.create_h_tunnel(prev_x, new_x, new_y)
+
+				# add objects to the new room
+				self.place_objects(new_room)
+
+				# append new room to list
+				rooms.append(new_room)
+				num_rooms += 1
+
+	def create_room(self, room):
+		# make tiles within rectangle able to be traversed
+		self.map.carve_rect(room.x1 + 1, room.y1 + 1, room.x2, room.y2)
+
+	def create_h_tunnel(self, x1, x2, y):
+		self.map.carve_h_line(x1, x2, y)
+
+	def create_v_tunnel(self, y1, y2, x):
+		self.map.carve_v_line(y1, y2, x)
+
+	def place_objects(self, room):
+		rng = self.rng
+
+		# choose random number of monsters
+		num_monsters = rng.randint(0, MAX_ROOM_MONSTERS)
+
+		for i in range(num_monsters):
+			# choose random spot for this monster
+			x = rng.randint(room.x1, room.x2)
+			y = rng.randint(room.y1, room.y2)
+
+			# place if tile is not blocked
+			if not self.is_blocked(x, y):
+				if rng.randint(0, 100) < 80: # 80% chance of getting an orc
+					# create orc
+					fighter_component = Fighter(hp=10, defense=0, power=3, death_function=monster_death)
+					ai_component = BasicMonster()
+					monster = Object(x, y, 'o', 'orc', color_desaturated_green,
+						blocks=True, fighter=fighter_component, ai=ai_component)
+				else:
+					# create a troll
+					fighter_component = Fighter(hp=16, defense=1, power=4, death_function=monster_death)
+					ai_component = BasicMonster()
+					monster = Object(x, y, 'T', 'troll', color_darker_green,
+						blocks=True, fighter=fighter_component, ai=ai_component)
 
+				self.add_object(monster)
 
-def monster_death(monster):
-	# gets transformed into a corpse
-	print monster.name.capitalize() + ' is dead!'
-	monster.char = '%'
-	monster.color = libtcod.dark_red
-	monster.blocks = False
-	monster.fighter = None
-	monster.ai = None
-	monster.name = 'remains of ' + monster.name
+	def is_blocked(self, x, y):
+		# test the tile map
+		if self.map.blocked[self.map.index(x, y)]:
+			return True
 
-	monster.send_to_back()
+		# check for blocking objects
+		return self.object_index.is_blocked(x, y)
+
+	def recompute_fov(self):
+		self.fov_mask = self.fov.compute(self.player.x, self.player.y, TORCH_RADIUS, FOV_LIGHT_WALLS)
+		self.fov_revision += 1
+		self.revision += 1
+
+		# everything in view is now explored
+		self.map.explore(self.fov_mask)
+
+		self.wake_monsters_in_fov()
+
+	def wake_monster(self, monster):
+		# move a sleeping monster into the set that gets turns
+		if not monster.ai.awake:
+			monster.ai.awake = True
+			self.scheduler.schedule(monster, 0)
+
+	def monsters_near(self, x, y, radius):
+		# every monster within radius of (x, y)
+		for cy in range(max(y - radius, 0), min(y + radius, MAP_HEIGHT - 1) + 1):
+			for cx in range(max(x - radius, 0), min(x + radius, MAP_WIDTH - 1) + 1):
+				for obj in self.object_index.objects_at(cx, cy):
+					if obj.ai:
+						yield obj
+
+	def make_noise(self, x, y, radius):
+		# wake every monster within radius of (x, y) and send it there to look
+		self.noise_distance.set_goal(x, y)
+		for obj in list(self.monsters_near(x, y, radius)):
+			obj.ai.heard = True
+			self.wake_monster(obj)
+
+	def wake_monsters_in_fov(self):
+		# wake sleeping monsters the player can now see, or is close to
+		ys, xs = numpy.nonzero(self.fov_mask)
+		for x, y in zip(xs.tolist(), ys.tolist()):
+			for obj in self.object_index.objects_at(x, y):
+				if obj.ai:
+					self.wake_monster(obj)
+		for obj in list(self.monsters_near(self.player.x, self.player.y, WAKE_RADIUS)):
+			self.wake_monster(obj)
+
+	def player_move_or_attack(self, dx, dy):
+		player = self.player
+
+		# direction player is moving or attacking
+		x = player.x + dx
+		y = player.y + dy
+
+		# look for attackable object
+		target = self.object_index.fighter_at(x, y)
+
+		# attack if target found, move otherwise
+		if target is not None:
+			player.fighter.attack(target)
+		else:
+			player.move(dx, dy)
+			self.recompute_fov()
+			# one search from the player, shared by every chasing monster,
+			# run when the first of them asks
+			self.player_distance.set_goal(player.x, player.y)
 
 
 ########################################################
 # Window setup and main game loop
 ########################################################
 
-libtcod.console_set_custom_font('arial10x10.png', libtcod.FONT_TYPE_GREYSCALE | libtcod.FONT_LAYOUT_TCOD)
-libtcod.console_init_root(SCREEN_WIDTH, SCREEN_HEIGHT, 'ARTIFICE', False)
-libtcod.sys_set_fps(LIMIT_FPS)
-con = libtcod.console_new(SCREEN_WIDTH, SCREEN_HEIGHT)
-
-# create player object
-fighter_component = Fighter(hp=30, defense=2, power=5, death_function=player_death)
-player = Object(0, 0, '@', 'player', libtcod.white, blocks=True, fighter=fighter_component, speed=PLAYER_SPEED)
+def main():
+	renderer = LibtcodRenderer(SCREEN_WIDTH, SCREEN_HEIGHT, 'ARTIFICE', LIMIT_FPS)
+	game = Game(renderer, LibtcodInput())
+	game.run()
 
-objects = [player]
 
-make_map()
-
-fov_map = libtcod.map_new(MAP_WIDTH, MAP_HEIGHT)
-for y in range(MAP_HEIGHT):
-	for x in range(MAP_WIDTH):
-		libtcod.map_set_properties(fov_map, x, y, not map[x][y].block_sight, not map[x][y].blocked)
-
-fov_recompute = True
-
-game_state = 'playing'
-player_action = None
-
-while not libtcod.console_is_window_closed():
-
-	render_all()
-
-	libtcod.console_flush()
-
-	# clear objects at their previous location
-	for object in objects:
-		object.clear()
-
-	# handle keys and exit game if esc is pressed
-	player_action = handle_keys()
-	if player_action == 'exit':
-		break
-
-	# let monsters take their turn
-	if game_state == 'playing':
-		for obj in objects:
-			if obj.ai:
-				if obj.wait > 0: # still waiting, don't take turn
-					obj.wait -= 1
-				else:
-					obj.ai.take_turn()
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,99 @@
+# HUD widgets for LibtcodRenderer. Each one draws a value read off the
+# game onto an off-screen panel console, and only when that value changed,
+# so an unchanged HUD costs one comparison per widget
+try:
+	import libtcodpy as libtcod
+except Exception:
+	# no libtcod library for this platform. the widgets draw on libtcod
+	# consoles, so only LibtcodRenderer can use them
+	libtcod = None
+
+from palette import color_black, color_white
+
+
+class Widget:
+	# A rectangle of the panel drawn from read(game). value is what is
+	# drawn there now, None until the first draw
+	def __init__(self, x, y, width, height=1):
+		self.x = x
+		self.y = y
+		self.width = width
+		self.height = height
+		self.value = None
+
+	def update(self, con, game, color):
+		# redraw on con if the value changed, true if it did. color turns
+		# packed colors into libtcod ones
+		value = self.read(game)
+		if value == self.value:
+			return False
+		self.value = value
+		libtcod.console_set_default_background(con, color(color_black))
+		libtcod.console_rect(con, self.x, self.y, self.width, self.height, True, libtcod.BKGND_SET)
+		self.draw(con, value, color)
+		return True
+
+	def invalidate(self):
+		# draw again on the next update, e.g. after the panel was cleared
+		self.value = None
+
+
+class Text(Widget):
+	# one line of text from text(game)
+	def __init__(self, x, y, width, text, fore=color_white):
+		Widget.__init__(self, x, y, width)
+		self.text = text
+		self.fore = fore
+
+	def read(self, game):
+		return self.text(game)
+
+	def draw(self, con, value, color):
+		libtcod.console_set_default_foreground(con, color(self.fore))
+		libtcod.console_print_ex(con, self.x, self.y, libtcod.BKGND_NONE, libtcod.LEFT, value[:self.width])
+
+
+class Bar(Widget):
+	# a bar filled in proportion to the (value, maximum) from values(game),
+	# labelled "name: value/maximum"
+	def __init__(self, x, y, width, name, values, full, empty, fore=color_white):
+		Widget.__init__(self, x, y, width)
+		self.name = name
+		self.values = values
+		self.full = full
+		self.empty = empty
+		self.fore = fore
+
+	def read(self, game):
+		return self.values(game)
+
+	def draw(self, con, value, color):
+		(current, maximum) = value
+		filled = int(float(max(current, 0)) / maximum * self.width) if maximum else 0
+
+		# render the background first, then the filled part on top
+		libtcod.console_set_default_background(con, color(self.empty))
+		libtcod.console_rect(con, self.x, self.y, self.width, 1, False, libtcod.BKGND_SET)
+		if filled > 0:
+			libtcod.console_set_default_background(con, color(self.full))
+			libtcod.console_rect(con, self.x, self.y, filled, 1, False, libtcod.BKGND_SET)
+
+		# centered text with the values
+		libtcod.console_set_default_foreground(con, color(self.fore))
+		libtcod.console_print_ex(con, self.x + self.width // 2, self.y, libtcod.BKGND_NONE, libtcod.CENTER,
+			self.name + ': ' + str(current) + '/' + str(maximum))
+
+
+class MessagePanel(Widget):
+	# the last height messages of the game's log, one per line, oldest on top.
+	# the value is the log and its revision, so the messages are only
+	# formatted when one was added
+	def read(self, game):
+		return (game.log, game.log.revision)
+
+	def draw(self, con, value, color):
+		(log, revision) = value
+		for (i, (text, fore)) in enumerate(log.tail(self.height)):
+			libtcod.console_set_default_foreground(con, color(fore))
+			libtcod.console_print_ex(con, self.x, self.y + i, libtcod.BKGND_NONE, libtcod.LEFT,
+				text[:self.width])
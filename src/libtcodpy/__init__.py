@@ -28,6 +28,7 @@
 from __future__ import print_function
 import os
 import sys
+import array
 import ctypes
 import struct
 from ctypes import *
@@ -534,6 +535,11 @@ class Key(Structure):
 class ConsoleBuffer:
     # simple console that allows direct (fast) access to cells. simplifies
     # use of the "fill" functions.
+
+    # fraction of the cells that must have changed before blit fills the
+    # whole console instead of setting the changed cells one by one
+    dirty_threshold = 0.25
+
     def __init__(self, width, height, back_r=0, back_g=0, back_b=0, fore_r=0, fore_g=0, fore_b=0, char=' '):
         # initialize with given width and height. values to fill the buffer
         # are optional, defaults to black with no characters.
@@ -553,6 +559,10 @@ class ConsoleBuffer:
         self.fore_g = [fore_g] * n
         self.fore_b = [fore_b] * n
         self.char = [ord(char)] * n
+        # indices of the cells whose background / foreground and character
+        # changed since they were last blitted
+        self.dirty_back = set(range(n))
+        self.dirty_fore = set(range(n))
 
     def copy(self):
         # returns a copy of this ConsoleBuffer.
@@ -566,6 +576,8 @@ class ConsoleBuffer:
         other.fore_g = list(self.fore_g)
         other.fore_b = list(self.fore_b)
         other.char = list(self.char)
+        other.dirty_back = set(self.dirty_back)
+        other.dirty_fore = set(self.dirty_fore)
         return other
 
     def set_fore(self, x, y, r, g, b, char):
@@ -575,6 +587,7 @@ class ConsoleBuffer:
         self.fore_g[i] = int(g)
         self.fore_b[i] = int(b)
         self.char[i] = ord(char)
+        self.dirty_fore.add(i)
 
     def set_back(self, x, y, r, g, b):
         # set the background color of one cell.
@@ -582,6 +595,7 @@ class ConsoleBuffer:
         self.back_r[i] = int(r)
         self.back_g[i] = int(g)
         self.back_b[i] = int(b)
+        self.dirty_back.add(i)
 
     def set(self, x, y, back_r, back_g, back_b, fore_r, fore_g, fore_b, char):
         # set the background color, foreground color and character of one cell.
@@ -593,21 +607,190 @@ class ConsoleBuffer:
         self.fore_g[i] = int(fore_g)
         self.fore_b[i] = int(fore_b)
         self.char[i] = ord(char)
+        self.dirty_back.add(i)
+        self.dirty_fore.add(i)
+
+    def mark_dirty(self):
+        # blit everything next time, e.g. after drawing on the destination
+        # console by other means.
+        n = self.width * self.height
+        self.dirty_back = set(range(n))
+        self.dirty_fore = set(range(n))
+
+    def dirty_rows(self):
+        # sorted list of the rows that have changed cells.
+        width = self.width
+        return sorted(set(i // width for i in self.dirty_back | self.dirty_fore))
+
+    def blit(self, dest, fill_fore=True, fill_back=True, x=0, y=0):
+        # write the cells that changed since the last blit to a console, with
+        # the buffer's top left corner at (x, y). when enough of them changed
+        # and the buffer covers the whole console, use libtcod's "fill"
+        # functions instead.
+        dest_width = console_get_width(dest)
+        dest_height = console_get_height(dest)
+        if (x < 0 or y < 0 or x + self.width > dest_width or
+            y + self.height > dest_height):
+            raise ValueError('ConsoleBuffer.blit: Buffer does not fit in the destination console.')
+
+        dirty_back = self.dirty_back if fill_back else set()
+        dirty_fore = self.dirty_fore if fill_fore else set()
+        n = self.width * self.height
+        whole = (x == 0 and y == 0 and
+                 self.width == dest_width and self.height == dest_height)
+        if whole and max(len(dirty_back), len(dirty_fore)) > self.dirty_threshold * n:
+            self.blit_all(dest, fill_fore and dirty_fore, fill_back and dirty_back)
+        else:
+            self.blit_cells(dest, dirty_back, dirty_fore, x, y)
+
+        if fill_back:
+            self.dirty_back = set()
+        if fill_fore:
+            self.dirty_fore = set()
+
+    def blit_all(self, dest, fill_fore=True, fill_back=True):
+        # write the whole buffer to a console of the same size with
+        # libtcod's "fill" functions.
+        if fill_back:
+            _lib.TCOD_console_fill_background(c_void_p(dest), _c_int_array_type(len(self.back_r))(*self.back_r), _c_int_array_type(len(self.back_g))(*self.back_g), _c_int_array_type(len(self.back_b))(*self.back_b))
+
+        if fill_fore:
+            _lib.TCOD_console_fill_foreground(c_void_p(dest), _c_int_array_type(len(self.fore_r))(*self.fore_r), _c_int_array_type(len(self.fore_g))(*self.fore_g), _c_int_array_type(len(self.fore_b))(*self.fore_b))
+            _lib.TCOD_console_fill_char(c_void_p(dest), _c_int_array_type(len(self.char))(*self.char))
+
+    def blit_cells(self, dest, dirty_back, dirty_fore, x=0, y=0):
+        # write the given cells to a console one by one, row by row, with the
+        # buffer's top left corner at (x, y).
+        width = self.width
+        for i in sorted(dirty_back | dirty_fore):
+            cx = x + i % width
+            cy = y + i // width
+            back = Color(self.back_r[i], self.back_g[i], self.back_b[i])
+            fore = Color(self.fore_r[i], self.fore_g[i], self.fore_b[i])
+            if i in dirty_back and i in dirty_fore:
+                _lib.TCOD_console_put_char_ex(c_void_p(dest), cx, cy, self.char[i], fore, back)
+            elif i in dirty_back:
+                _lib.TCOD_console_set_char_background(c_void_p(dest), cx, cy, back, BKGND_SET)
+            else:
+                _lib.TCOD_console_set_char_foreground(c_void_p(dest), cx, cy, fore)
+                _lib.TCOD_console_set_char(c_void_p(dest), cx, cy, self.char[i])
+
+class ArrayConsoleBuffer:
+    # variant of ConsoleBuffer that keeps each plane in one contiguous int32
+    # array, so blit hands them to libtcod as they are. the planes are
+    # height x width NumPy arrays when NumPy is available, otherwise flat
+    # row-major array.array('i') (index y * width + x).
+    _planes = ('back_r', 'back_g', 'back_b', 'fore_r', 'fore_g', 'fore_b', 'char')
+
+    def __init__(self, width, height, back_r=0, back_g=0, back_b=0, fore_r=0, fore_g=0, fore_b=0, char=' '):
+        self.width = width
+        self.height = height
+        for name in self._planes:
+            if numpy_available:
+                plane = numpy.zeros((height, width), dtype=numpy.int32)
+            else:
+                plane = array.array('i', [0]) * (width * height)
+            setattr(self, name, plane)
+        self._setup()
+        self.clear(back_r, back_g, back_b, fore_r, fore_g, fore_b, char)
+
+    def _setup(self):
+        # flat views for single cells, and C pointers for blit, made once
+        if numpy_available:
+            self._flat = [getattr(self, name).reshape(-1) for name in self._planes]
+            self._pointers = [getattr(self, name).ctypes.data_as(POINTER(c_int))
+                              for name in self._planes]
+        else:
+            self._flat = [getattr(self, name) for name in self._planes]
+            self._pointers = [cast(c_void_p(getattr(self, name).buffer_info()[0]), POINTER(c_int))
+                              for name in self._planes]
+
+    def clear(self, back_r=0, back_g=0, back_b=0, fore_r=0, fore_g=0, fore_b=0, char=' '):
+        # clears the console. values to fill it with are optional, defaults
+        # to black with no characters.
+        self.fill(0, 0, self.width, self.height, (back_r, back_g, back_b),
+                  (fore_r, fore_g, fore_b), char)
+
+    def fill(self, x, y, w, h, back=None, fore=None, char=None):
+        # set the background (r, g, b), foreground (r, g, b) and/or
+        # character of every cell in a rectangle. None leaves that part as is
+        values = []
+        if back is not None:
+            values += zip(self._planes[0:3], back)
+        if fore is not None:
+            values += zip(self._planes[3:6], fore)
+        if char is not None:
+            values.append(('char', ord(char)))
+
+        for (name, value) in values:
+            plane = getattr(self, name)
+            if numpy_available:
+                plane[y:y + h, x:x + w] = value
+            else:
+                row = array.array('i', [int(value)]) * w
+                for i in range(y * self.width + x, (y + h) * self.width + x, self.width):
+                    plane[i:i + w] = row
+
+    def copy_region(self, src, x, y, w, h, dest_x=0, dest_y=0):
+        # copy the w x h cells at (x, y) of the ArrayConsoleBuffer src to
+        # (dest_x, dest_y) of this one
+        for name in self._planes:
+            plane = getattr(self, name)
+            src_plane = getattr(src, name)
+            if numpy_available:
+                plane[dest_y:dest_y + h, dest_x:dest_x + w] = src_plane[y:y + h, x:x + w]
+            else:
+                for row in range(h):
+                    i = (dest_y + row) * self.width + dest_x
+                    j = (y + row) * src.width + x
+                    plane[i:i + w] = src_plane[j:j + w]
+
+    def region(self, x, y, w, h):
+        # returns a new ArrayConsoleBuffer holding a copy of a rectangle
+        other = ArrayConsoleBuffer(w, h)
+        other.copy_region(self, x, y, w, h)
+        return other
+
+    def copy(self):
+        # returns a copy of this ArrayConsoleBuffer.
+        return self.region(0, 0, self.width, self.height)
+
+    def set_fore(self, x, y, r, g, b, char):
+        # set the character and foreground color of one cell.
+        i = self.width * y + x
+        flat = self._flat
+        flat[3][i] = int(r)
+        flat[4][i] = int(g)
+        flat[5][i] = int(b)
+        flat[6][i] = ord(char)
+
+    def set_back(self, x, y, r, g, b):
+        # set the background color of one cell.
+        i = self.width * y + x
+        flat = self._flat
+        flat[0][i] = int(r)
+        flat[1][i] = int(g)
+        flat[2][i] = int(b)
+
+    def set(self, x, y, back_r, back_g, back_b, fore_r, fore_g, fore_b, char):
+        # set the background color, foreground color and character of one cell.
+        self.set_back(x, y, back_r, back_g, back_b)
+        self.set_fore(x, y, fore_r, fore_g, fore_b, char)
 
     def blit(self, dest, fill_fore=True, fill_back=True):
-        # use libtcod's "fill" functions to write the buffer to a console.
+        # use libtcod's "fill" functions to write the buffer to a console,
+        # straight from the planes' memory.
         if (console_get_width(dest) != self.width or
             console_get_height(dest) != self.height):
-            raise ValueError('ConsoleBuffer.blit: Destination console has an incorrect size.')
-
-        s = struct.Struct('%di' % len(self.back_r))
+            raise ValueError('ArrayConsoleBuffer.blit: Destination console has an incorrect size.')
 
+        p = self._pointers
         if fill_back:
-            _lib.TCOD_console_fill_background(c_void_p(dest), (c_int * len(self.back_r))(*self.back_r), (c_int * len(self.back_g))(*self.back_g), (c_int * len(self.back_b))(*self.back_b))
+            _lib.TCOD_console_fill_background(c_void_p(dest), p[0], p[1], p[2])
 
         if fill_fore:
-            _lib.TCOD_console_fill_foreground(c_void_p(dest), (c_int * len(self.fore_r))(*self.fore_r), (c_int * len(self.fore_g))(*self.fore_g), (c_int * len(self.fore_b))(*self.fore_b))
-            _lib.TCOD_console_fill_char(c_void_p(dest), (c_int * len(self.char))(*self.char))
+            _lib.TCOD_console_fill_foreground(c_void_p(dest), p[3], p[4], p[5])
+            _lib.TCOD_console_fill_char(c_void_p(dest), p[6])
 
 _lib.TCOD_console_is_fullscreen.restype = c_bool
 _lib.TCOD_console_is_window_closed.restype = c_bool
@@ -1158,27 +1341,62 @@ def console_delete(con):
     _lib.TCOD_console_delete(con)
 
 # fast color filling
+
+# ctypes array types by length, made once instead of on every fill
+_c_int_array_types = {}
+
+def _c_int_array_type(n):
+    array_type = _c_int_array_types.get(n)
+    if array_type is None:
+        array_type = _c_int_array_types[n] = c_int * n
+    return array_type
+
+def _int_buffer_pointer(arr):
+    # returns a POINTER(c_int) to the values of arr and the object that owns
+    # that memory, which must stay alive while the pointer is used. numpy
+    # arrays, array.array('i'), c_int arrays and any other contiguous int32
+    # buffer (a memoryview cast to 'i', ...) are used without a copy. other
+    # sequences are converted element by element.
+    if numpy_available and isinstance(arr, numpy.ndarray):
+        #numpy arrays, use numpy's ctypes functions
+        arr = numpy.ascontiguousarray(arr, dtype=numpy.int32)
+        return arr.ctypes.data_as(POINTER(c_int)), arr
+
+    if isinstance(arr, ctypes.Array) and arr._type_ in (c_int, c_int32):
+        return cast(arr, POINTER(c_int)), arr
+
+    if isinstance(arr, array.array):
+        if arr.typecode in ('i', 'l') and arr.itemsize == 4:
+            return cast(c_void_p(arr.buffer_info()[0]), POINTER(c_int)), arr
+    else:
+        try:
+            view = memoryview(arr)
+        except TypeError:
+            view = None
+        if (view is not None and view.itemsize == 4 and
+            view.format.lstrip('@=') in ('i', 'l') and
+            getattr(view, 'c_contiguous', False)):
+            array_type = _c_int_array_type(view.nbytes // 4)
+            if view.readonly:
+                # one memory copy, still no per element conversion
+                carr = array_type.from_buffer_copy(view)
+            else:
+                carr = array_type.from_buffer(view)
+            return cast(carr, POINTER(c_int)), carr
+
+    # otherwise convert using ctypes arrays
+    carr = _c_int_array_type(len(arr))(*arr)
+    return cast(carr, POINTER(c_int)), carr
+
 _lib.TCOD_console_fill_foreground.restype=c_void
 _lib.TCOD_console_fill_foreground.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int), POINTER(c_int)]
 def console_fill_foreground(con,r,g,b) :
     if len(r) != len(g) or len(r) != len(b):
         raise TypeError('R, G and B must all have the same size.')
 
-    if (numpy_available and isinstance(r, numpy.ndarray) and
-        isinstance(g, numpy.ndarray) and isinstance(b, numpy.ndarray)):
-        #numpy arrays, use numpy's ctypes functions
-        r = numpy.ascontiguousarray(r, dtype=numpy.int32)
-        g = numpy.ascontiguousarray(g, dtype=numpy.int32)
-        b = numpy.ascontiguousarray(b, dtype=numpy.int32)
-        cr = r.ctypes.data_as(POINTER(c_int))
-        cg = g.ctypes.data_as(POINTER(c_int))
-        cb = b.ctypes.data_as(POINTER(c_int))
-    else:
-        # otherwise convert using ctypes arrays
-        cr = (c_int * len(r))(*r)
-        cg = (c_int * len(g))(*g)
-        cb = (c_int * len(b))(*b)
-
+    cr, r = _int_buffer_pointer(r)
+    cg, g = _int_buffer_pointer(g)
+    cb, b = _int_buffer_pointer(b)
     _lib.TCOD_console_fill_foreground(c_void_p(con), cr, cg, cb)
 
 _lib.TCOD_console_fill_background.restype=c_void
@@ -1188,36 +1406,79 @@ def console_fill_background(con,r,g,b) :
     if len(r) != len(g) or len(r) != len(b):
         raise TypeError('R, G and B must all have the same size.')
 
-    if (numpy_available and isinstance(r, numpy.ndarray) and
-        isinstance(g, numpy.ndarray) and isinstance(b, numpy.ndarray)):
-        #numpy arrays, use numpy's ctypes functions
-        r = numpy.ascontiguousarray(r, dtype=numpy.int32)
-        g = numpy.ascontiguousarray(g, dtype=numpy.int32)
-        b = numpy.ascontiguousarray(b, dtype=numpy.int32)
-        cr = r.ctypes.data_as(POINTER(c_int))
-        cg = g.ctypes.data_as(POINTER(c_int))
-        cb = b.ctypes.data_as(POINTER(c_int))
-    else:
-        # otherwise convert using ctypes arrays
-        cr = (c_int * len(r))(*r)
-        cg = (c_int * len(g))(*g)
-        cb = (c_int * len(b))(*b)
-
+    cr, r = _int_buffer_pointer(r)
+    cg, g = _int_buffer_pointer(g)
+    cb, b = _int_buffer_pointer(b)
     _lib.TCOD_console_fill_background(c_void_p(con), cr, cg, cb)
 
 
 _lib.TCOD_console_fill_char.restype=c_void
 _lib.TCOD_console_fill_char.argtypes=[c_void_p , POINTER(c_int)]
 def console_fill_char(con,arr) :
-    if (numpy_available and isinstance(arr, numpy.ndarray) ):
-        #numpy arrays, use numpy's ctypes functions
-        arr = numpy.ascontiguousarray(arr, dtype=numpy.int32)
-        carr = arr.ctypes.data_as(POINTER(c_int))
-    else:
-        carr = (c_int * len(arr))(*arr)
-
+    carr, arr = _int_buffer_pointer(arr)
     _lib.TCOD_console_fill_char(c_void_p(con), carr)
 
+# packed cells: character, foreground and background of each cell in one
+# block of memory, row by row
+class ConsoleCell(Structure):
+    _fields_=[('ch', c_int),
+              ('fore', Color),
+              ('back', Color),
+              ]
+
+if numpy_available:
+    # numpy view of a ConsoleCell array
+    console_cell_dtype = numpy.dtype({
+        'names': ['ch', 'fore', 'back'],
+        'formats': [numpy.int32, (numpy.uint8, 3), (numpy.uint8, 3)],
+        'offsets': [ConsoleCell.ch.offset, ConsoleCell.fore.offset, ConsoleCell.back.offset],
+        'itemsize': sizeof(ConsoleCell)})
+
+def console_new_cells(con):
+    # returns a ConsoleCell array the size of con
+    return (ConsoleCell * (console_get_width(con) * console_get_height(con)))()
+
+def console_fill_cells(con, cells):
+    # write a ConsoleCell array (or a numpy array of console_cell_dtype) to
+    # con, characters and colors at once
+    n = console_get_width(con) * console_get_height(con)
+    if len(cells) != n:
+        raise TypeError('cells must have one entry per console cell.')
+
+    if numpy_available:
+        if not isinstance(cells, numpy.ndarray):
+            cells = numpy.frombuffer(cells, dtype=console_cell_dtype)
+        fore = cells['fore'].reshape(n, 3)
+        back = cells['back'].reshape(n, 3)
+        console_fill_background(con, back[:, 0], back[:, 1], back[:, 2])
+        console_fill_foreground(con, fore[:, 0], fore[:, 1], fore[:, 2])
+        console_fill_char(con, cells['ch'].ravel())
+    else:
+        console_fill_background(con, [c.back.r for c in cells], [c.back.g for c in cells], [c.back.b for c in cells])
+        console_fill_foreground(con, [c.fore.r for c in cells], [c.fore.g for c in cells], [c.fore.b for c in cells])
+        console_fill_char(con, array.array('i', [c.ch for c in cells]))
+
+def console_get_cells(con, cells=None):
+    # read the characters and colors of con into a ConsoleCell array, a new
+    # one if cells is None. libtcod has no bulk read, so this costs three
+    # calls per cell
+    width = console_get_width(con)
+    height = console_get_height(con)
+    if cells is None:
+        cells = console_new_cells(con)
+    elif len(cells) != width * height:
+        raise TypeError('cells must have one entry per console cell.')
+
+    i = 0
+    for y in range(height):
+        for x in range(width):
+            cell = cells[i]
+            cell.ch = _lib.TCOD_console_get_char(c_void_p(con), x, y)
+            cell.fore = _lib.TCOD_console_get_char_foreground(c_void_p(con), x, y)
+            cell.back = _lib.TCOD_console_get_char_background(c_void_p(con), x, y)
+            i += 1
+    return cells
+
 _lib.TCOD_console_load_asc.restype=c_bool
 _lib.TCOD_console_load_asc.argtypes=[c_void_p , c_char_p]
 def console_load_asc(con, filename) :
@@ -2052,6 +2313,137 @@ _lib.TCOD_map_get_nb_cells.argtypes=[c_void_p ]
 def map_get_nb_cells(map):
     return TCOD_map_get_nb_cells(map)
 
+# bulk access to the cells of a map. each cell is one byte holding the
+# transparent (bit 0), walkable (bit 1) and fov (bit 2) flags.
+class _CMap(Structure):
+    _fields_=[('width', c_int),
+              ('height', c_int),
+              ('nbcells', c_int),
+              ('cells', POINTER(c_uint8)),
+              ]
+
+_MAP_TRANSPARENT_BIT = 0
+_MAP_WALKABLE_BIT = 1
+_MAP_FOV_BIT = 2
+
+# byte -> flag lookup tables, for bytes.translate when NumPy is missing
+_map_flag_tables = [bytes(bytearray((i >> bit) & 1 for i in range(256)))
+                    for bit in range(3)]
+
+# whether _CMap matches the library's map struct, checked once at import by
+# _map_probe_layout. if it doesn't, the bulk functions fall back to one
+# library call per cell
+_map_layout_ok = True
+
+def _map_get_flag_array(m, bit):
+    # returns one flag of every cell, either as a height x width NumPy bool
+    # array or, without NumPy, as a row-major bytearray (index y * width + x)
+    if not _map_layout_ok:
+        return _map_get_flag_array_per_cell(m, bit)
+    cmap = cast(m, POINTER(_CMap)).contents
+    if numpy_available:
+        cells = numpy.ctypeslib.as_array(cmap.cells, shape=(cmap.nbcells,))
+        return ((cells & (1 << bit)) != 0).reshape(cmap.height, cmap.width)
+    return bytearray(string_at(cmap.cells, cmap.nbcells).translate(_map_flag_tables[bit]))
+
+def _map_get_flag_array_per_cell(m, bit):
+    # _map_get_flag_array through the library's own accessors
+    get = {_MAP_TRANSPARENT_BIT: map_is_transparent,
+           _MAP_WALKABLE_BIT: map_is_walkable,
+           _MAP_FOV_BIT: map_is_in_fov}[bit]
+    w = map_get_width(m)
+    h = map_get_height(m)
+    flags = bytearray(1 if get(m, x, y) else 0 for y in range(h) for x in range(w))
+    if numpy_available:
+        return numpy.frombuffer(bytes(flags), dtype=numpy.uint8).astype(bool).reshape(h, w)
+    return flags
+
+def map_get_fov_array(m):
+    return _map_get_flag_array(m, _MAP_FOV_BIT)
+
+def map_get_transparent_array(m):
+    return _map_get_flag_array(m, _MAP_TRANSPARENT_BIT)
+
+def map_get_walkable_array(m):
+    return _map_get_flag_array(m, _MAP_WALKABLE_BIT)
+
+def map_set_properties_rect(m, x, y, w, h, transparent, walkable):
+    # set the properties of the w x h cells starting at (x, y) in one pass.
+    # transparent and walkable hold one value per cell, row by row, in any
+    # sequence or buffer (NumPy array, array.array, bytearray, ...)
+    if x < 0 or y < 0 or x + w > map_get_width(m) or y + h > map_get_height(m):
+        raise ValueError('map_set_properties_rect: Rectangle is outside of the map.')
+
+    if numpy_available:
+        trans = numpy.asarray(transparent)
+        walk = numpy.asarray(walkable)
+        if trans.size != w * h or walk.size != w * h:
+            raise TypeError('Transparent and walkable must both have one value per cell.')
+        if not _map_layout_ok:
+            _map_set_properties_per_cell(m, x, y, w, h, trans.ravel().tolist(), walk.ravel().tolist())
+            return
+        cmap = cast(m, POINTER(_CMap)).contents
+        cells = numpy.ctypeslib.as_array(cmap.cells, shape=(cmap.nbcells,))
+        region = cells.reshape(cmap.height, cmap.width)[y:y + h, x:x + w]
+        # keep the fov flag, replace the other two
+        region &= 1 << _MAP_FOV_BIT
+        region |= (trans.reshape(h, w) != 0).astype(numpy.uint8) << _MAP_TRANSPARENT_BIT
+        region |= (walk.reshape(h, w) != 0).astype(numpy.uint8) << _MAP_WALKABLE_BIT
+    else:
+        if len(transparent) != w * h or len(walkable) != w * h:
+            raise TypeError('Transparent and walkable must both have one value per cell.')
+        if not _map_layout_ok:
+            _map_set_properties_per_cell(m, x, y, w, h, transparent, walkable)
+            return
+        cmap = cast(m, POINTER(_CMap)).contents
+        cells = cast(cmap.cells, POINTER(c_uint8 * cmap.nbcells)).contents
+        fov = 1 << _MAP_FOV_BIT
+        for row in range(h):
+            start = (y + row) * cmap.width + x
+            trans = transparent[row * w:(row + 1) * w]
+            walk = walkable[row * w:(row + 1) * w]
+            cells[start:start + w] = [(c & fov) | (1 if t else 0) | (2 if k else 0)
+                                      for c, t, k in zip(cells[start:start + w], trans, walk)]
+
+def _map_set_properties_per_cell(m, x, y, w, h, transparent, walkable):
+    # map_set_properties_rect through the library's own map_set_properties
+    for row in range(h):
+        for col in range(w):
+            i = row * w + col
+            map_set_properties(m, x + col, y + row, bool(transparent[i]), bool(walkable[i]))
+
+def map_set_properties_array(m, transparent, walkable):
+    # set the properties of every cell of the map from two arrays, see
+    # map_set_properties_rect
+    map_set_properties_rect(m, 0, 0, map_get_width(m), map_get_height(m), transparent, walkable)
+
+def _map_probe_layout():
+    # set a couple of cells through the library and check that reading the
+    # map struct directly sees them. the size fields are checked first, so
+    # a struct that doesn't match is never followed to its cells
+    m = map_new(3, 2)
+    try:
+        cmap = cast(m, POINTER(_CMap)).contents
+        if (cmap.width, cmap.height, cmap.nbcells) != (3, 2, 6):
+            return False
+        map_clear(m)
+        map_set_properties(m, 2, 1, True, False)
+        map_set_properties(m, 0, 1, False, True)
+        for bit, expected in ((_MAP_TRANSPARENT_BIT, [0, 0, 0, 0, 0, 1]),
+                              (_MAP_WALKABLE_BIT, [0, 0, 0, 1, 0, 0])):
+            flags = _map_get_flag_array(m, bit)
+            if numpy_available:
+                flags = flags.ravel()
+            if [1 if f else 0 for f in flags] != expected:
+                return False
+        return True
+    except Exception:
+        return False
+    finally:
+        map_delete(m)
+
+_map_layout_ok = _map_probe_layout()
+
 ############################
 # pathfinding module
 ############################
@@ -0,0 +1,91 @@
+import atexit
+import collections
+import threading
+
+try:
+	import queue
+except ImportError:
+	# Python 2
+	import Queue as queue
+
+from palette import color_white
+
+
+def format_message(message):
+	# the text of a (template, args, color) message, capitalized. without
+	# args the template is the text, so it may hold a literal %
+	(template, args, color) = message
+	text = template % args if args else template
+	return text[:1].upper() + text[1:]
+
+
+class MessageLog:
+	# The last size game messages, kept as (template, args, color) and only
+	# formatted when something shows them, so logging a hit costs a tuple.
+	# With log_file, messages are also appended to that file in batches of
+	# batch_size, written by a background thread. Whatever is left is
+	# written at exit if close was never called
+	def __init__(self, size=100, log_file=None, batch_size=32):
+		self.messages = collections.deque(maxlen=size)
+		# bumped on every message, so renderers know when to redraw
+		self.revision = 0
+
+		self.batch_size = batch_size
+		self.pending = []
+		self.writer = LogFileWriter(log_file) if log_file else None
+		if self.writer is not None:
+			atexit.register(self.close)
+
+	def add(self, template, args=(), color=color_white):
+		message = (template, args, color)
+		self.messages.append(message)
+		self.revision += 1
+		if self.writer is not None:
+			self.pending.append(message)
+			if len(self.pending) >= self.batch_size:
+				self.flush()
+
+	def tail(self, count):
+		# the last count messages as (text, color), oldest first
+		messages = list(self.messages)[-count:] if count > 0 else []
+		return [(format_message(message), message[2]) for message in messages]
+
+	def flush(self):
+		# hand the messages not yet written to the log file writer
+		if self.writer is not None and self.pending:
+			self.writer.write(self.pending)
+			self.pending = []
+
+	def close(self):
+		# write out everything and stop the writer
+		if self.writer is not None:
+			self.flush()
+			self.writer.close()
+			self.writer = None
+
+
+class LogFileWriter:
+	# Appends batches of messages to a file from a background thread, so
+	# the game never waits on the disk
+	def __init__(self, path):
+		self.queue = queue.Queue()
+		self.thread = threading.Thread(target=self.run, args=(path,))
+		self.thread.daemon = True
+		self.thread.start()
+
+	def write(self, messages):
+		self.queue.put(messages)
+
+	def run(self, path):
+		with open(path, 'a') as log_file:
+			while True:
+				messages = self.queue.get()
+				if messages is None:
+					break
+				log_file.write(''.join(format_message(message) + '\n' for message in messages))
+				log_file.flush()
+
+	def close(self):
+		# returns once everything queued has been written
+		self.queue.put(None)
+		self.thread.join()
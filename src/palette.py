@@ -0,0 +1,147 @@
+# Colors as packed 0xRRGGBB ints, or as uint8 (r, g, b) triples in NumPy
+# arrays when working on many at once. Neither needs libtcod, so render
+# code only makes a libtcod Color when it finally draws something
+import numpy
+
+
+def pack(r, g, b):
+	return (int(r) << 16) | (int(g) << 8) | int(b)
+
+
+def unpack(color):
+	# (r, g, b) of a packed color
+	return ((color >> 16) & 0xff, (color >> 8) & 0xff, color & 0xff)
+
+
+def to_rgb(colors):
+	# packed colors (an int or any array of them) to a ... x 3 uint8 array
+	colors = numpy.asarray(colors, dtype=numpy.int32)
+	return numpy.stack([(colors >> 16) & 0xff, (colors >> 8) & 0xff, colors & 0xff], axis=-1).astype(numpy.uint8)
+
+
+def to_packed(rgb):
+	# ... x 3 array of (r, g, b) to packed int32 colors
+	rgb = numpy.asarray(rgb, dtype=numpy.int32)
+	return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def lerp(a, b, t):
+	# colors between the (r, g, b) arrays a and b, t = 0 giving a and t = 1
+	# giving b. t can be a number or an array, one value per color
+	a = numpy.asarray(a, dtype=numpy.float32)
+	b = numpy.asarray(b, dtype=numpy.float32)
+	t = numpy.asarray(t, dtype=numpy.float32)
+	if t.ndim:
+		t = t[..., numpy.newaxis]
+	return numpy.clip(a + (b - a) * t + 0.5, 0, 255).astype(numpy.uint8)
+
+
+def scale(rgb, factor):
+	# (r, g, b) array times factor (a number or one per color), clamped
+	rgb = numpy.asarray(rgb, dtype=numpy.float32)
+	factor = numpy.asarray(factor, dtype=numpy.float32)
+	if factor.ndim:
+		factor = factor[..., numpy.newaxis]
+	return numpy.clip(rgb * factor + 0.5, 0, 255).astype(numpy.uint8)
+
+
+def add(a, b):
+	# sum of two (r, g, b) arrays, clamped to 255
+	total = numpy.asarray(a, dtype=numpy.int32) + numpy.asarray(b, dtype=numpy.int32)
+	return numpy.minimum(total, 255).astype(numpy.uint8)
+
+
+def gen_map(colors, indexes):
+	# gradient through colors, color i sitting at position indexes[i], as
+	# an (indexes[-1] + 1) x 3 uint8 array. like libtcod's color_gen_map
+	colors = numpy.asarray(colors, dtype=numpy.float32)
+	positions = numpy.arange(indexes[-1] + 1)
+	channels = [numpy.interp(positions, indexes, colors[:, c]) for c in range(3)]
+	return numpy.clip(numpy.stack(channels, axis=-1) + 0.5, 0, 255).astype(numpy.uint8)
+
+
+def rgb_to_hsv(rgb):
+	# ... x 3 array of (r, g, b) to ... x 3 float32 (h, s, v), with the hue
+	# in degrees and saturation and value between 0 and 1, as in libtcod
+	rgb = numpy.asarray(rgb, dtype=numpy.float32) / 255
+	(r, g, b) = (rgb[..., 0], rgb[..., 1], rgb[..., 2])
+	high = rgb.max(axis=-1)
+	low = rgb.min(axis=-1)
+	delta = high - low
+	# avoid dividing by zero for greys, whose hue and saturation are 0
+	safe = numpy.where(delta > 0, delta, 1)
+
+	hue = numpy.where(high == r, (g - b) / safe,
+		numpy.where(high == g, 2 + (b - r) / safe, 4 + (r - g) / safe))
+	hue = numpy.where(delta > 0, (hue * 60) % 360, 0)
+	saturation = numpy.where(high > 0, delta / numpy.where(high > 0, high, 1), 0)
+	return numpy.stack([hue, saturation, high], axis=-1).astype(numpy.float32)
+
+
+def hsv_to_rgb(hsv):
+	# ... x 3 array of (h, s, v) back to (r, g, b) as uint8
+	hsv = numpy.asarray(hsv, dtype=numpy.float32)
+	(h, s, v) = (hsv[..., 0] % 360 / 60, hsv[..., 1], hsv[..., 2])
+	sector = numpy.floor(h).astype(numpy.int32) % 6
+	f = h - numpy.floor(h)
+	p = v * (1 - s)
+	q = v * (1 - s * f)
+	t = v * (1 - s * (1 - f))
+
+	# (r, g, b) for each of the six sectors of the hue circle
+	choices = numpy.stack([
+		numpy.stack([v, t, p], axis=-1), numpy.stack([q, v, p], axis=-1),
+		numpy.stack([p, v, t], axis=-1), numpy.stack([p, q, v], axis=-1),
+		numpy.stack([t, p, v], axis=-1), numpy.stack([v, p, q], axis=-1)])
+	rgb = numpy.take_along_axis(choices, sector[numpy.newaxis, ..., numpy.newaxis], axis=0)[0]
+	return numpy.clip(rgb * 255 + 0.5, 0, 255).astype(numpy.uint8)
+
+
+def scale_hsv(rgb, saturation, value):
+	# (r, g, b) array with saturation and value multiplied by the given
+	# factors (numbers or one per color), like libtcod's color_scale_HSV
+	hsv = rgb_to_hsv(rgb)
+	hsv[..., 1] = numpy.clip(hsv[..., 1] * saturation, 0, 1)
+	hsv[..., 2] = numpy.clip(hsv[..., 2] * value, 0, 1)
+	return hsv_to_rgb(hsv)
+
+
+class Palette:
+	# Named colors, each stored once. Interning a name again gives the
+	# same packed color, and rgb holds every color as one uint8 row so a
+	# whole array of palette indices can be turned into colors at once
+	def __init__(self):
+		self.names = {}
+		self.colors = []
+		self.rgb = numpy.zeros((0, 3), dtype=numpy.uint8)
+
+	def intern(self, name, rgb):
+		# the packed color for name, added with the given (r, g, b) if new
+		index = self.names.get(name)
+		if index is None:
+			index = self.names[name] = len(self.colors)
+			self.colors.append(pack(*rgb))
+			self.rgb = numpy.vstack([self.rgb, numpy.array([rgb], dtype=numpy.uint8)])
+		return self.colors[index]
+
+	def index(self, name):
+		# row of name in rgb
+		return self.names[name]
+
+	def __getitem__(self, name):
+		return self.colors[self.names[name]]
+
+
+palette = Palette()
+
+color_black = palette.intern('black', (0, 0, 0))
+color_white = palette.intern('white', (255, 255, 255))
+color_dark_red = palette.intern('dark_red', (191, 0, 0))
+color_desaturated_green = palette.intern('desaturated_green', (63, 127, 63))
+color_darker_green = palette.intern('darker_green', (0, 127, 0))
+color_dark_wall = palette.intern('dark_wall', (0, 0, 100))
+color_light_wall = palette.intern('light_wall', (130, 110, 50))
+color_dark_ground = palette.intern('dark_ground', (50, 50, 150))
+color_light_ground = palette.intern('light_ground', (200, 180, 50))
+color_light_red = palette.intern('light_red', (255, 114, 114))
+color_darker_red = palette.intern('darker_red', (127, 0, 0))
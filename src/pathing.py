@@ -0,0 +1,83 @@
+import numpy
+
+# distance of cells that can't be reached from the goal
+UNREACHABLE = 1 << 30
+
+# steps to the 8 neighbouring cells, straight ones first
+NEIGHBOURS = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+
+class DistanceField:
+	# Number of moves (diagonal moves cost the same as straight ones) from
+	# every cell to a goal, so any number of chasers can share one search.
+	# set_goal only notes the goal; the search runs when a distance is
+	# first asked for, so moves nobody chases after cost nothing. It runs
+	# again if the tile map's revision changed since
+	def __init__(self, tile_map):
+		# the map's blocked plane is read on every compute
+		self.tile_map = tile_map
+		self.blocked = tile_map.plane('blocked')
+		self.height, self.width = self.blocked.shape
+		self.revision = None
+
+		# one cell of padding all round, never walkable, so neighbours of
+		# any map cell are plain offsets into the flattened arrays
+		self.padded_width = self.width + 2
+		self.padded = numpy.full((self.height + 2, self.padded_width), UNREACHABLE, dtype=numpy.int32)
+		self.distances = self.padded[1:-1, 1:-1]
+		self.open = numpy.zeros(self.padded.shape, dtype=bool)
+		self.offsets = numpy.array([dy * self.padded_width + dx for (dx, dy) in NEIGHBOURS])
+		self.goal = None
+		self.dirty = False
+
+	def set_goal(self, x, y):
+		self.goal = (x, y)
+		self.dirty = True
+
+	def update(self):
+		if self.dirty or self.revision != self.tile_map.revision:
+			self.compute(*self.goal)
+
+	def compute(self, x, y):
+		# breadth-first flood from (x, y), growing only the frontier
+		self.goal = (x, y)
+		self.dirty = False
+		self.revision = self.tile_map.revision
+		self.padded.fill(UNREACHABLE)
+		# cells not reached yet that can be walked on
+		numpy.equal(self.blocked, 0, out=self.open[1:-1, 1:-1])
+		distances = self.padded.ravel()
+		is_open = self.open.ravel()
+
+		start = (y + 1) * self.padded_width + x + 1
+		distances[start] = 0
+		is_open[start] = False
+		frontier = numpy.array([start])
+		step = 0
+		while len(frontier):
+			step += 1
+			grown = (frontier[:, numpy.newaxis] + self.offsets).ravel()
+			grown = numpy.unique(grown[is_open[grown]])
+			is_open[grown] = False
+			distances[grown] = step
+			frontier = grown
+
+	def distance(self, x, y):
+		self.update()
+		return int(self.distances[y, x])
+
+	def downhill(self, x, y, is_blocked):
+		# the step from (x, y) that gets closest to the goal, skipping
+		# cells for which is_blocked(x, y) is true. (0, 0) if none helps
+		self.update()
+		best = self.distances[y, x]
+		step = (0, 0)
+		for (dx, dy) in NEIGHBOURS:
+			nx = x + dx
+			ny = y + dy
+			if 0 <= nx < self.width and 0 <= ny < self.height:
+				d = self.distances[ny, nx]
+				if d < best and not is_blocked(nx, ny):
+					best = d
+					step = (dx, dy)
+		return step
@@ -0,0 +1,53 @@
+import heapq
+import itertools
+
+
+class Scheduler:
+	# Turn scheduler: a heap of the ticks at which objects get their next
+	# turn, so each tick only touches the objects whose turn has come
+	def __init__(self):
+		self.time = 0
+		self.queue = []
+		self.entries = {}
+		self.counter = itertools.count()
+
+	def schedule(self, obj, delay, wake=True):
+		# give obj its next turn delay ticks from now, replacing any turn
+		# it already had. pop_due only returns objects scheduled with
+		# wake=True; the others (the player, whose turns come from input)
+		# check is_due themselves
+		self.cancel(obj)
+		entry = [self.time + delay, next(self.counter), obj]
+		self.entries[obj] = entry
+		if wake:
+			heapq.heappush(self.queue, entry)
+
+	def cancel(self, obj):
+		# drop obj's pending turn; its heap entry is skipped when popped
+		entry = self.entries.pop(obj, None)
+		if entry is not None:
+			entry[-1] = None
+
+	def is_due(self, obj):
+		entry = self.entries.get(obj)
+		return entry is not None and entry[0] <= self.time
+
+	def pending(self):
+		# true if an object scheduled with wake=True is waiting for its turn
+		while self.queue and self.queue[0][-1] is None:
+			heapq.heappop(self.queue)
+		return bool(self.queue)
+
+	def tick(self):
+		self.time += 1
+
+	def pop_due(self):
+		# remove and return the objects whose turn has come, in turn order
+		due = []
+		while self.queue and self.queue[0][0] <= self.time:
+			entry = heapq.heappop(self.queue)
+			obj = entry[-1]
+			if obj is not None:
+				del self.entries[obj]
+				due.append(obj)
+		return due
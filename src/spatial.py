@@ -0,0 +1,98 @@
+from collections import OrderedDict
+
+# render layers of objects (their "layer" attribute), drawn bottom to top
+LAYER_ITEMS = 0
+LAYER_ACTORS = 1
+LAYER_PLAYER = 2
+LAYER_EFFECTS = 3
+LAYER_COUNT = 4
+
+
+class SpatialIndex:
+	# Spatial hash of objects keyed by their (x, y) map cell, so
+	# "what is standing here?" doesn't need a scan of the object list.
+	# Objects are also kept per render layer, in order of arrival like the
+	# cells, as the keys of an OrderedDict
+	def __init__(self):
+		self.cells = {}
+		self.layers = [OrderedDict() for i in range(LAYER_COUNT)]
+		# cells whose objects changed since the last pop_changed
+		self.changed = set()
+
+	def add(self, obj):
+		# start tracking an object at its current position
+		self.layers[obj.layer][obj] = None
+		self.add_to_cell(obj)
+
+	def remove(self, obj):
+		# stop tracking an object
+		del self.layers[obj.layer][obj]
+		self.remove_from_cell(obj)
+
+	def add_to_cell(self, obj):
+		key = (obj.x, obj.y)
+		self.changed.add(key)
+		cell = self.cells.get(key)
+		if cell is None:
+			self.cells[key] = [obj]
+		else:
+			cell.append(obj)
+
+	def remove_from_cell(self, obj):
+		# drop the object's cell once it's empty
+		key = (obj.x, obj.y)
+		self.changed.add(key)
+		cell = self.cells[key]
+		cell.remove(obj)
+		if not cell:
+			del self.cells[key]
+
+	def move(self, obj, x, y):
+		# set an object's position and keep its cell up to date
+		self.remove_from_cell(obj)
+		obj.x = x
+		obj.y = y
+		self.add_to_cell(obj)
+
+	def set_layer(self, obj, layer):
+		# move an object to another render layer
+		del self.layers[obj.layer][obj]
+		obj.layer = layer
+		self.layers[layer][obj] = None
+		self.changed.add((obj.x, obj.y))
+
+	def touch(self, obj):
+		# note that an object's looks changed without it moving
+		self.changed.add((obj.x, obj.y))
+
+	def pop_changed(self):
+		# the changed cells, forgetting them
+		changed = self.changed
+		self.changed = set()
+		return changed
+
+	def objects_at(self, x, y):
+		return self.cells.get((x, y), ())
+
+	def top_at(self, x, y):
+		# the object drawn on (x, y): the one on the highest layer, the
+		# latest to arrive if several share it. None if there is none
+		top = None
+		for obj in self.cells.get((x, y), ()):
+			if top is None or obj.layer >= top.layer:
+				top = obj
+		return top
+
+	def is_blocked(self, x, y):
+		# true if a blocking object stands on (x, y)
+		for obj in self.cells.get((x, y), ()):
+			if obj.blocks:
+				return True
+		return False
+
+	def fighter_at(self, x, y):
+		# first object on (x, y) that can be attacked, if any
+		for obj in self.cells.get((x, y), ()):
+			if obj.fighter:
+				return obj
+		return None
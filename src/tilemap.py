@@ -0,0 +1,201 @@
+import numpy
+
+
+class TileType:
+	# A kind of tile. Its looks are up to the renderer
+	def __init__(self, name, blocked, block_sight):
+		self.name = name
+		self.blocked = blocked
+		self.block_sight = block_sight
+
+
+# TileMap.tile_type holds an index into tile_types for each cell
+TILE_WALL = 0
+TILE_FLOOR = 1
+
+tile_types = [
+	TileType('wall', blocked=True, block_sight=True),
+	TileType('floor', blocked=False, block_sight=False),
+]
+
+
+class TileMap:
+	# The tile properties of a map, each stored as one contiguous bytearray
+	# (1 byte per cell, row-major: index = y * width + x)
+	def __init__(self, width, height, blocked=True):
+		self.width = width
+		self.height = height
+
+		fill = bytearray([1 if blocked else 0])
+		self.tile_type = bytearray([TILE_WALL if blocked else TILE_FLOOR]) * (width * height)
+		self.blocked = fill * (width * height)
+		# by default, if a tile is blocked, it also blocks sight
+		self.block_sight = fill * (width * height)
+		self.explored = bytearray(width * height)
+
+		# decals (corpses, ...) lying on the map: the char of each cell's
+		# decal, 0 for none, and its color as a palette index
+		self.decal_char = bytearray(width * height)
+		self.decal_color = bytearray(width * height)
+
+		# bumped whenever blocked or block_sight change, so anything
+		# computed from them knows when it is stale
+		self.revision = 0
+		# likewise for the decals
+		self.decal_revision = 0
+
+	def __getitem__(self, x):
+		# map[x][y] access for code written against a grid of Tile objects
+		return TileColumn(self, x)
+
+	def plane(self, name):
+		# height x width uint8 NumPy view of one of the planes, sharing its memory
+		return numpy.frombuffer(getattr(self, name), dtype=numpy.uint8).reshape(self.height, self.width)
+
+	def add_decal(self, x, y, char, color):
+		# leave char in palette color index color on (x, y), replacing
+		# any decal already there
+		i = self.index(x, y)
+		self.decal_char[i] = ord(char)
+		self.decal_color[i] = color
+		self.decal_revision += 1
+
+	def explore(self, mask):
+		# mark everything in a height x width bool mask (e.g. the FOV) explored
+		explored = self.plane('explored')
+		explored |= mask
+
+	def explored_count(self):
+		return int(numpy.count_nonzero(self.plane('explored')))
+
+	def explored_bounds(self):
+		# (x1, y1, x2, y2) of the explored area, x2 and y2 exclusive, or
+		# None if nothing has been explored
+		ys, xs = numpy.nonzero(self.plane('explored'))
+		if not len(xs):
+			return None
+		return (int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+
+	def frontier(self):
+		# height x width bool array of the explored, unblocked cells next
+		# to an unexplored one: where exploring should continue from
+		explored = self.plane('explored') != 0
+		# unexplored cells, with the outside of the map counting as explored
+		unexplored = numpy.zeros((self.height + 2, self.width + 2), dtype=bool)
+		unexplored[1:-1, 1:-1] = ~explored
+		near = numpy.zeros((self.height, self.width), dtype=bool)
+		for dy in (0, 1, 2):
+			for dx in (0, 1, 2):
+				near |= unexplored[dy:dy + self.height, dx:dx + self.width]
+		return near & explored & (self.plane('blocked') == 0)
+
+	def save_explored(self):
+		# the explored plane packed 8 cells to a byte
+		return numpy.packbits(self.plane('explored') != 0).tobytes()
+
+	def load_explored(self, data):
+		# restore the explored plane from save_explored's bytes
+		if len(data) != (self.width * self.height + 7) // 8:
+			raise ValueError('explored data is for a map of a different size')
+		bits = numpy.unpackbits(numpy.frombuffer(data, dtype=numpy.uint8))
+		self.explored[:] = bits[:self.width * self.height].tobytes()
+
+	def index(self, x, y):
+		return y * self.width + x
+
+	def fill_rect(self, x1, y1, x2, y2, tile):
+		# make all tiles with x1 <= x < x2 and y1 <= y < y2 of type tile
+		if x2 <= x1:
+			return
+		tile_type = tile_types[tile]
+		n = x2 - x1
+		types = bytearray([tile]) * n
+		blocked = bytearray([1 if tile_type.blocked else 0]) * n
+		block_sight = bytearray([1 if tile_type.block_sight else 0]) * n
+		self.revision += 1
+		for y in range(y1, y2):
+			start = y * self.width + x1
+			self.tile_type[start:start + n] = types
+			self.blocked[start:start + n] = blocked
+			self.block_sight[start:start + n] = block_sight
+
+	def fill_v_line(self, y1, y2, x, tile):
+		# make tiles from y1 to y2 (inclusive, either order) on column x of type tile
+		tile_type = tile_types[tile]
+		top = min(y1, y2)
+		bottom = max(y1, y2)
+		start = top * self.width + x
+		stop = bottom * self.width + x + 1
+		n = bottom - top + 1
+		self.revision += 1
+		self.tile_type[start:stop:self.width] = bytearray([tile]) * n
+		self.blocked[start:stop:self.width] = bytearray([1 if tile_type.blocked else 0]) * n
+		self.block_sight[start:stop:self.width] = bytearray([1 if tile_type.block_sight else 0]) * n
+
+	def refresh_tile_type(self, i):
+		# after blocked or block_sight of cell i were set directly, give it
+		# the tile type with those properties. if none has them, e.g.
+		# halfway through turning floor into wall, the type stays as it is
+		flags = (bool(self.blocked[i]), bool(self.block_sight[i]))
+		for (tile, tile_type) in enumerate(tile_types):
+			if (tile_type.blocked, tile_type.block_sight) == flags:
+				self.tile_type[i] = tile
+				return
+
+	def carve_rect(self, x1, y1, x2, y2):
+		# make all tiles with x1 <= x < x2 and y1 <= y < y2 traversable
+		self.fill_rect(x1, y1, x2, y2, TILE_FLOOR)
+
+	def carve_h_line(self, x1, x2, y):
+		# make tiles from x1 to x2 (inclusive, either order) on row y traversable
+		self.carve_rect(min(x1, x2), y, max(x1, x2) + 1, y + 1)
+
+	def carve_v_line(self, y1, y2, x):
+		# make tiles from y1 to y2 (inclusive, either order) on column x traversable
+		self.fill_v_line(y1, y2, x, TILE_FLOOR)
+
+
+class TileColumn:
+	# map[x], only meant to be indexed again with y
+	def __init__(self, tile_map, x):
+		self.tile_map = tile_map
+		self.x = x
+
+	def __getitem__(self, y):
+		return TileView(self.tile_map, self.tile_map.index(self.x, y))
+
+
+class TileView(object):
+	# Tile-like view of a single cell of a TileMap
+	def __init__(self, tile_map, i):
+		self.tile_map = tile_map
+		self.i = i
+
+	def get_tile_type(self):
+		return self.tile_map.tile_type[self.i]
+	def set_tile_type(self, value):
+		(y, x) = divmod(self.i, self.tile_map.width)
+		self.tile_map.fill_rect(x, y, x + 1, y + 1, value)
+	tile_type = property(get_tile_type, set_tile_type)
+
+	def get_blocked(self):
+		return bool(self.tile_map.blocked[self.i])
+	def set_blocked(self, value):
+		self.tile_map.blocked[self.i] = 1 if value else 0
+		self.tile_map.revision += 1
+		self.tile_map.refresh_tile_type(self.i)
+	blocked = property(get_blocked, set_blocked)
+
+	def get_block_sight(self):
+		return bool(self.tile_map.block_sight[self.i])
+	def set_block_sight(self, value):
+		self.tile_map.block_sight[self.i] = 1 if value else 0
+		self.tile_map.revision += 1
+		self.tile_map.refresh_tile_type(self.i)
+	block_sight = property(get_block_sight, set_block_sight)
+
+	def get_explored(self):
+		return bool(self.tile_map.explored[self.i])
+	def set_explored(self, value):
+		self.tile_map.explored[self.i] = 1 if value else 0
+	explored = property(get_explored, set_explored)